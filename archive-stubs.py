@@ -9,254 +9,269 @@ Archival Criteria:
 4. Low priority + old - Created before 2025-12 AND priority is low/medium
 5. Duplicates - Similar feature names or descriptions
 
+The criteria are declarative rules in archive-rules.config.json (see archive_rules.py).
+
 Conservative approach: Only archive clear candidates.
+
+Usage:
+    python archive-stubs.py                     # analyze and archive in one go
+    python archive-stubs.py --plan plan.json    # dry run: write the plan, touch nothing else
+    python archive-stubs.py --plan              # dry run: print the plan to stdout
+    python archive-stubs.py --apply plan.json   # execute a reviewed plan
 """
 
+import argparse
+import contextlib
+import errno
+import filecmp
+import hashlib
 import json
 import os
 import shutil
+import sys
+from collections import Counter
 from pathlib import Path
-from datetime import datetime
-from typing import List, Dict, Tuple
+from datetime import date, datetime
+from typing import List, Dict, Optional, Tuple
+
+from archive_rules import PRIORITY_RANK, RULES_CONFIG, RuleEngine
+from keyword_matcher import load_keyword_groups
+from stub_catalog import StubCatalog, add_batch_arguments
+from stub_similarity import DEFAULT_THRESHOLD, DuplicateCluster, find_duplicate_clusters
 
 WORKING_DIR = Path(r"C:\Users\willh\Desktop\assistant\coderef\working")
 ARCHIVE_DIR = Path(r"C:\Users\willh\Desktop\assistant\coderef\archived")
+ARCHIVE_SNAPSHOT = ARCHIVE_DIR.parent / ".stub-catalog-archived.json"
+VERDICT_CACHE = ARCHIVE_DIR.parent / ".archive-verdicts.json"
+PLAN_VERSION = 1
+RULESET_VERSION = 2  # bump whenever rule engine semantics change, to invalidate cached verdicts
+ARCHIVED_PREFIX = "archived/"  # key prefix for archived stubs in duplicate clusters
 
-# Ensure archive directory exists
-ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
-
-class ArchiveAnalysis:
-    def __init__(self):
-        self.stubs: Dict[str, Dict] = {}
-        self.candidates: Dict[str, Tuple[str, str]] = {}  # {name: (reason, stub_id)}
-        self.archive_report = []
-
-    def load_stubs(self) -> int:
-        """Load all stub.json files from working directory."""
-        count = 0
-        for stub_dir in WORKING_DIR.iterdir():
-            if not stub_dir.is_dir():
-                continue
-
-            stub_file = stub_dir / "stub.json"
-            if not stub_file.exists():
-                continue
-
-            try:
-                with open(stub_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.stubs[stub_dir.name] = data
-                    count += 1
-            except Exception as e:
-                print(f"Warning: Failed to read {stub_file}: {e}")
-
-        return count
-
-    def is_test_example(self, name: str, data: Dict) -> bool:
-        """Check if stub is a test/example."""
-        keywords = ["test", "example", "stub-location"]
-        name_lower = name.lower()
-
-        for keyword in keywords:
-            if keyword in name_lower:
-                return True
-
-        # Check description for test indicators
-        desc = data.get("description", "").lower()
-        if any(k in desc for k in ["test ", "testing ", "example ", "verify stub"]):
-            if "test" in name_lower or "example" in name_lower:
-                return True
 
+def same_tree(left: Path, right: Path) -> bool:
+    """True if two directories hold the same files with the same contents."""
+    comparison = filecmp.dircmp(str(left), str(right))
+    if comparison.left_only or comparison.right_only or comparison.funny_files:
         return False
 
-    def is_completed(self, data: Dict) -> bool:
-        """Check if stub is marked as completed."""
-        status = data.get("status", "").lower()
-        if status in ["completed", "done", "archived"]:
-            return True
-
-        # Check if workorder completed
-        context = data.get("context", {})
-        if isinstance(context, dict):
-            if context.get("status") in ["completed", "done"]:
-                return True
-
+    _, mismatch, errors = filecmp.cmpfiles(str(left), str(right), comparison.common_files, shallow=False)
+    if mismatch or errors:
         return False
 
-    def is_obsolete_name(self, name: str) -> bool:
-        """Check if name indicates obsolete/superseded work."""
-        obsolete_keywords = [
-            "deprecated",
-            "remove-",
-            "delete-",
-            "redundant-",
-            "duplicate-",
-            "old-",
-            "legacy-",
-            "unused-",
-            "stale-",
-            "archived-",
-            "deprecated-",
-        ]
-
-        name_lower = name.lower()
-        for keyword in obsolete_keywords:
-            if keyword in name_lower:
-                return True
+    return all(same_tree(left / sub, right / sub) for sub in comparison.common_dirs)
 
-        return False
 
-    def is_low_priority_old(self, data: Dict) -> bool:
-        """Check if stub is low/medium priority AND created before 2025-12-20."""
-        priority = data.get("priority", "").lower()
-        if priority not in ["low", "medium"]:
-            return False
+def move_dir(src: Path, dst: Path) -> None:
+    """Move a directory with os.rename, copying only when crossing filesystems."""
+    try:
+        os.rename(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(str(src), str(dst))
 
-        created = data.get("created", "")
-        try:
-            created_date = datetime.strptime(created, "%Y-%m-%d")
-            # Archive if created before mid-December 2025 (gives 2-week buffer)
-            if created_date < datetime(2025, 12, 20):
-                return True
-        except:
-            pass
 
-        return False
+class ArchiveAnalysis:
+    def __init__(self, read_only: bool = False, similarity: float = DEFAULT_THRESHOLD, as_of: Optional[date] = None):
+        self.catalog = StubCatalog(WORKING_DIR, read_only=read_only)
+        self.archive_catalog = StubCatalog(ARCHIVE_DIR, snapshot_path=ARCHIVE_SNAPSHOT, read_only=read_only)
+        self.similarity = similarity
+        self.rules = RuleEngine.from_config(today=as_of)
+        self.stubs: Dict[str, Dict] = {}
+        self.archived: Dict[str, Dict] = {}
+        self.clusters: List[DuplicateCluster] = []
+        self.duplicate_of: Dict[str, Tuple[str, float]] = {}  # {name: (kept stub, similarity)}
+        self.candidates: Dict[str, Tuple[str, str]] = {}  # {name: (reason, stub_id)}
+        self.read_only = read_only
+        self.evaluated = 0  # stubs whose verdict was (re)computed by the last analyze()
+        self.archive_report = []
 
-    def is_vague_exploration(self, name: str, data: Dict) -> bool:
-        """Check if stub is vague exploration/brainstorm with no clear scope."""
-        status = data.get("status", "").lower()
-        if status not in ["brainstorming", "exploration", "research"]:
-            return False
-
-        # Very vague stubs without clear direction
-        vague_keywords = [
-            "ideas",
-            "audit",
-            "review",
-            "investigation",
-            "analysis",
-            "improvements",
-            "research",
-        ]
-
-        name_lower = name.lower()
-        for keyword in vague_keywords:
-            if keyword in name_lower:
-                return True
-
-        # Check description length - very short descriptions indicate incomplete planning
-        description = data.get("description", "").strip()
-        if status == "brainstorming" and len(description) < 50:
-            return True
+    def load_stubs(self, jobs: int = 1, pool: str = "process") -> int:
+        """Load all stub.json files from working directory (via the stub catalog)."""
+        count = self.catalog.load(jobs=jobs, pool=pool)
+        for stub_file, error in self.catalog.errors:
+            print(f"Warning: Failed to read {stub_file}: {error}")
 
-        return False
+        self.stubs = self.catalog.as_dict()
 
-    def is_infrastructure_utility(self, name: str, data: Dict) -> bool:
-        """Check if stub is infrastructure/utility without active priority."""
-        category = data.get("category", "").lower()
-        priority = data.get("priority", "").lower()
-        status = data.get("status", "").lower()
-
-        # Infrastructure/utility stubs with low/medium priority in planning stage
-        if category in ["infrastructure", "utility", "refactor", "cleanup"]:
-            if priority in ["low", "medium"] and status == "planning":
-                # But exclude recent ones (less than 1 week old)
-                created = data.get("created", "")
-                try:
-                    created_date = datetime.strptime(created, "%Y-%m-%d")
-                    if created_date < datetime(2026, 1, 6):  # Older than 1 week from 2026-01-13
-                        return True
-                except:
-                    pass
+        # Archived stubs only feed duplicate detection
+        self.archive_catalog.load(jobs=jobs, pool=pool)
+        self.archived = self.archive_catalog.as_dict()
+        return count
 
-        return False
+    def find_duplicates(self) -> None:
+        """Cluster near-duplicate working + archived stubs (MinHash/LSH) and pick one keeper per cluster."""
+        corpus = dict(self.stubs)
+        corpus.update({ARCHIVED_PREFIX + name: data for name, data in self.archived.items()})
 
-    def is_duplicate(self, name: str, data: Dict) -> bool:
-        """Check if stub might be a duplicate of another active stub."""
-        # List of clearly duplicate/related stubs
-        duplicate_groups = [
-            # Directory rename stubs (multiple versions)
-            (["coderef-directory-rename", "work-order-folder-rename"], "Directory structure refactoring"),
-            (["rename-execute-plan-to-align-plan", "rename-start-feature-command"], "Command renaming"),
-            (["scanner-output-validation", "scanner-python-detection", "scanner-script-path-config"], "Scanner configuration"),
-            (["websocket-live-update-test", "scriptboard-endpoints-test"], "Scriptboard testing"),
-            (["test-and-fix-emojis", "test-stub-example", "testing-brief-entry-point"], "Testing infrastructure"),
-            (["mcp-docs-workflow-refactor", "consolidate-foundation-docs-workflow"], "Docs consolidation"),
-        ]
-
-        for group, reason in duplicate_groups:
-            if name in group and len(group) > 1:
-                # Return True only if there are other stubs in this group with higher priority
-                other_stubs = [s for s in group if s != name]
-                if other_stubs:
-                    for other in other_stubs:
-                        if other in self.stubs:
-                            other_data = self.stubs[other]
-                            # Archive if other has higher or equal priority and created earlier/same time
-                            other_priority = {"critical": 0, "high": 1, "medium": 2, "low": 3}.get(
-                                other_data.get("priority", "low").lower(), 3
-                            )
-                            our_priority = {"critical": 0, "high": 1, "medium": 2, "low": 3}.get(
-                                data.get("priority", "low").lower(), 3
-                            )
-                            if other_priority <= our_priority:
-                                return True
+        self.clusters = find_duplicate_clusters(corpus, threshold=self.similarity)
+        self.duplicate_of = {}
 
-        return False
+        for cluster in self.clusters:
+            working = [name for name in cluster.members if name in self.stubs]
+            if len(working) < 2:
+                continue
+
+            # Keep the highest-priority, oldest stub; the rest are redundant
+            keeper = min(working, key=lambda n: (
+                PRIORITY_RANK.get(str(self.stubs[n].get("priority", "low")).lower(), 3),
+                str(self.stubs[n].get("created", "")),
+                n
+            ))
+            for name in working:
+                if name != keeper:
+                    self.duplicate_of[name] = (keeper, cluster.similarity(name))
+
+    def ruleset_id(self) -> str:
+        """Fingerprint of everything the predicates depend on besides the stub itself."""
+        with open(RULES_CONFIG, 'r', encoding='utf-8') as f:
+            rule_config = json.load(f)
+
+        rules = {
+            "version": RULESET_VERSION,
+            "rules": rule_config["rules"],
+            "keywords": load_keyword_groups("archive"),
+            "similarity": self.similarity
+        }
+        return hashlib.sha1(json.dumps(rules, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def stub_hash(self, name: str, data: Dict) -> str:
+        """
+        Content hash of a stub, plus its duplicate verdict (which depends on other
+        stubs) and its relative-age outcomes (which depend on the date), so a cached
+        verdict is only recomputed once the stub crosses an older_than_days cutoff.
+        """
+        key = [name, data, self.duplicate_of.get(name), self.rules.date_key(data)]
+        return hashlib.sha1(json.dumps(key, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def load_verdicts(self, ruleset: str) -> Dict[str, Dict]:
+        """Cached {name: {hash, reason}} verdicts, or {} if missing or from another rule set."""
+        try:
+            with open(VERDICT_CACHE, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        if cache.get("ruleset") != ruleset:
+            return {}
+        return cache.get("verdicts", {})
+
+    def save_verdicts(self, ruleset: str, verdicts: Dict[str, Dict]) -> None:
+        """Persist verdicts atomically (best effort - they can always be recomputed)."""
+        tmp_path = VERDICT_CACHE.with_name(VERDICT_CACHE.name + ".tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"ruleset": ruleset, "verdicts": verdicts}, f, sort_keys=True)
+            os.replace(tmp_path, VERDICT_CACHE)
+        except OSError as e:
+            print(f"Warning: Failed to write verdict cache {VERDICT_CACHE}: {e}")
 
     def analyze(self) -> None:
-        """Analyze all stubs and identify archival candidates."""
+        """Analyze all stubs and identify archival candidates (only new or edited stubs are re-evaluated)."""
         print(f"Analyzing {len(self.stubs)} stubs...\n")
 
+        self.find_duplicates()
+
+        ruleset = self.ruleset_id()
+        cached = self.load_verdicts(ruleset)
+        verdicts = {}
+        self.evaluated = 0
+
+        changed = {}
         for name, data in sorted(self.stubs.items()):
-            stub_id = data.get("stub_id", "UNKNOWN")
-            reason = None
-
-            # Check criteria in order (most specific to least specific)
-            if self.is_test_example(name, data):
-                reason = "TEST/EXAMPLE"
-            elif self.is_completed(data):
-                reason = "COMPLETED"
-            elif self.is_obsolete_name(name):
-                reason = "OBSOLETE_NAME"
-            elif self.is_duplicate(name, data):
-                reason = "DUPLICATE"
-            elif self.is_vague_exploration(name, data):
-                reason = "VAGUE_EXPLORATION"
-            elif self.is_infrastructure_utility(name, data):
-                reason = "INFRA_UTILITY_LOW"
-            elif self.is_low_priority_old(data):
-                reason = "LOW_PRIORITY_OLD"
-
-            if reason:
-                self.candidates[name] = (reason, stub_id)
-
-    def archive(self) -> None:
-        """Move identified stubs to archive directory."""
-        if not self.candidates:
+            digest = self.stub_hash(name, data)
+            verdict = cached.get(name)
+            if verdict and verdict["hash"] == digest:
+                verdicts[name] = verdict
+            else:
+                changed[name] = data
+                verdicts[name] = {"hash": digest, "reason": None}
+
+        # Evaluate all new or edited stubs in one column-wise batch
+        for name, reason in self.rules.evaluate(changed, set(self.duplicate_of)).items():
+            verdicts[name]["reason"] = reason
+        self.evaluated = len(changed)
+
+        for name, verdict in verdicts.items():
+            if verdict["reason"]:
+                self.candidates[name] = (verdict["reason"], self.stubs[name].get("stub_id", "UNKNOWN"))
+
+        # Hits cover every verdict (cached or fresh); timings only the re-evaluated stubs
+        hits = Counter(verdict["reason"] for verdict in verdicts.values() if verdict["reason"])
+        print(f"Evaluated {self.evaluated} new or changed stubs ({len(self.stubs) - self.evaluated} cached verdicts)")
+        print(f"  {'RULE':20} | {'HITS':>4} | {f'MS ({self.evaluated} RE-EVALUATED)':>20}")
+        for rule in self.rules.rules:
+            print(f"  {rule.reason:20} | {hits[rule.reason]:4} | {rule.seconds * 1000:20.3f}")
+        print()
+
+        if not self.read_only and verdicts != cached:
+            self.save_verdicts(ruleset, verdicts)
+
+    def build_plan(self) -> Dict:
+        """Turn analyze() candidates into a JSON-serializable plan of moves."""
+        moves = []
+        for name, (reason, stub_id) in sorted(self.candidates.items()):
+            move = {
+                "name": name,
+                "stub_id": stub_id,
+                "reason": reason,
+                "src": str(WORKING_DIR / name),
+                "dst": str(ARCHIVE_DIR / name)
+            }
+            if reason == "DUPLICATE":
+                move["duplicate_of"], move["similarity"] = self.duplicate_of[name]
+            moves.append(move)
+
+        return {
+            "version": PLAN_VERSION,
+            "generated": datetime.now().isoformat(),
+            "working_dir": str(WORKING_DIR),
+            "archive_dir": str(ARCHIVE_DIR),
+            "moves": moves,
+            "duplicate_clusters": [
+                {"members": cluster.members, "score": round(cluster.score, 3)}
+                for cluster in self.clusters
+            ]
+        }
+
+    def archive(self, plan: Dict) -> None:
+        """Execute the moves in a plan (see build_plan)."""
+        moves = plan.get("moves", [])
+        if not moves:
             print("No archival candidates identified.")
             return
 
-        print(f"\nArchiving {len(self.candidates)} stubs:\n")
+        print(f"\nArchiving {len(moves)} stubs:\n")
         print("-" * 80)
 
         archived_count = 0
+        skipped_count = 0
         failed = []
 
-        for name, (reason, stub_id) in sorted(self.candidates.items()):
-            src_dir = WORKING_DIR / name
-            dst_dir = ARCHIVE_DIR / name
+        Path(plan.get("archive_dir", ARCHIVE_DIR)).mkdir(parents=True, exist_ok=True)
 
-            try:
-                # Move directory
-                if dst_dir.exists():
-                    shutil.rmtree(dst_dir)
+        for move in moves:
+            name, reason, stub_id = move["name"], move["reason"], move["stub_id"]
+            src_dir = Path(move["src"])
+            dst_dir = Path(move["dst"])
 
-                shutil.move(str(src_dir), str(dst_dir))
-                archived_count += 1
+            try:
+                if not src_dir.exists() and dst_dir.exists():
+                    # Already archived by an earlier run
+                    status = "[SKIP]"
+                    skipped_count += 1
+                elif dst_dir.exists() and same_tree(src_dir, dst_dir):
+                    # Identical copy already archived - just drop the source
+                    shutil.rmtree(src_dir)
+                    status = "[SKIP]"
+                    skipped_count += 1
+                else:
+                    if dst_dir.exists():
+                        shutil.rmtree(dst_dir)
+                    move_dir(src_dir, dst_dir)
+                    status = "[OK]"
+                    archived_count += 1
 
-                status = "[OK]"
                 print(f"{status:15} | {stub_id:12} | {reason:20} | {name}")
 
                 self.archive_report.append({
@@ -274,8 +289,9 @@ class ArchiveAnalysis:
 
         print("-" * 80)
         print(f"\nArchival Summary:")
-        print(f"  Successfully archived: {archived_count}/{len(self.candidates)}")
-        print(f"  Failed: {len(failed)}/{len(self.candidates)}")
+        print(f"  Successfully archived: {archived_count}/{len(moves)}")
+        print(f"  Already archived (skipped): {skipped_count}/{len(moves)}")
+        print(f"  Failed: {len(failed)}/{len(moves)}")
 
         if failed:
             print(f"\nFailed archives:")
@@ -329,8 +345,8 @@ class ArchiveAnalysis:
    - Purpose: Old backlog items with low urgency
 
 5. DUPLICATE
-   - Similar stubs in same functional area
-   - Purpose: Consolidation - keep best version, archive redundant
+   - Near-duplicate feature_name/description/tags (MinHash + LSH, Jaccard >= threshold)
+   - Purpose: Consolidation - keep highest-priority/oldest version, archive redundant
         """)
 
         return "\n".join(report)
@@ -345,35 +361,98 @@ class ArchiveAnalysis:
 
 def main():
     """Main execution."""
-    print("\n" + "=" * 80)
-    print("ARCHIVE STUBS - Conservative Identification & Archival")
-    print("=" * 80)
-    print(f"Working directory: {WORKING_DIR}")
-    print(f"Archive directory: {ARCHIVE_DIR}\n")
-
-    analysis = ArchiveAnalysis()
-
-    # Load all stubs
-    stub_count = analysis.load_stubs()
-    print(f"Loaded {stub_count} stubs")
+    parser = argparse.ArgumentParser(description="Identify and archive old/obsolete stubs")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--plan",
+        nargs="?",
+        const="-",
+        metavar="PLAN_JSON",
+        help="Dry run: write the archival plan as JSON (to stdout if no path) and change nothing"
+    )
+    mode.add_argument(
+        "--apply",
+        metavar="PLAN_JSON",
+        help="Execute a plan written by --plan"
+    )
+    parser.add_argument(
+        "--similarity",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"Jaccard similarity for near-duplicate stubs (default: {DEFAULT_THRESHOLD})"
+    )
+    parser.add_argument(
+        "--as-of",
+        type=lambda value: datetime.strptime(value, "%Y-%m-%d").date(),
+        default=None,
+        help="Evaluate relative-age rules as of this date (YYYY-MM-DD, default: today)"
+    )
+    add_batch_arguments(parser)
+    args = parser.parse_args()
+
+    if args.apply:
+        with open(args.apply, 'r', encoding='utf-8') as f:
+            plan = json.load(f)
+        if plan.get("version") != PLAN_VERSION:
+            parser.error(f"Unsupported plan version: {plan.get('version')}")
+
+        print(f"Applying plan: {args.apply} ({len(plan['moves'])} moves)")
+        analysis = ArchiveAnalysis()
+        analysis.archive(plan)
+        analysis.save_report()
+        return
 
-    # Analyze candidates
-    analysis.analyze()
-    print(f"Identified {len(analysis.candidates)} archival candidates (conservative)\n")
+    # With --plan on stdout, keep progress output off the JSON stream
+    to_stdout = args.plan == "-"
+    with contextlib.redirect_stdout(sys.stderr) if to_stdout else contextlib.nullcontext():
+        print("\n" + "=" * 80)
+        print("ARCHIVE STUBS - Conservative Identification & Archival")
+        print("=" * 80)
+        print(f"Working directory: {WORKING_DIR}")
+        print(f"Archive directory: {ARCHIVE_DIR}\n")
+
+        analysis = ArchiveAnalysis(read_only=args.plan is not None, similarity=args.similarity, as_of=args.as_of)
+
+        # Load all stubs
+        stub_count = analysis.load_stubs(jobs=args.jobs, pool=args.pool)
+        print(f"Loaded {stub_count} stubs")
+
+        # Analyze candidates
+        analysis.analyze()
+        print(f"Identified {len(analysis.candidates)} archival candidates (conservative)\n")
+
+        if analysis.clusters:
+            print("NEAR-DUPLICATE CLUSTERS:")
+            print("-" * 80)
+            for cluster in analysis.clusters:
+                print(f"{cluster.score:.2f} | {', '.join(cluster.members)}")
+            print("-" * 80 + "\n")
+
+        if len(analysis.candidates) == 0 and args.plan is None:
+            print("No candidates identified. Exiting.")
+            return
 
-    if len(analysis.candidates) == 0:
-        print("No candidates identified. Exiting.")
+        # List candidates before archiving
+        print("ARCHIVAL CANDIDATES:")
+        print("-" * 80)
+        for name, (reason, stub_id) in sorted(analysis.candidates.items()):
+            print(f"{stub_id:12} | {reason:20} | {name}")
+        print("-" * 80 + "\n")
+
+    plan = analysis.build_plan()
+
+    if args.plan is not None:
+        plan_json = json.dumps(plan, indent=2)
+        if to_stdout:
+            print(plan_json)
+        else:
+            Path(args.plan).write_text(plan_json + "\n", encoding='utf-8')
+            print(f"Plan written to: {args.plan} ({len(plan['moves'])} moves)")
+            print(f"Review it, then run: python archive-stubs.py --apply {args.plan}")
         return
 
-    # List candidates before archiving
-    print("ARCHIVAL CANDIDATES:")
-    print("-" * 80)
-    for name, (reason, stub_id) in sorted(analysis.candidates.items()):
-        print(f"{stub_id:12} | {reason:20} | {name}")
-    print("-" * 80 + "\n")
-
     # Archive stubs
-    analysis.archive()
+    analysis.archive(plan)
 
     # Generate and save report
     analysis.save_report()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Archive Rules - Declarative, column-wise archival rule engine.
+
+Rules come from archive-rules.config.json. Stubs are first turned into columns
+(enum fields lowercased and interned, priorities mapped to ints, dates parsed
+once to ordinals), then every condition is evaluated as a boolean mask over
+the whole batch. Rules apply in order and the first match gives the reason.
+Each rule records its evaluation time and hit count.
+
+Usage:
+    from archive_rules import RuleEngine
+
+    engine = RuleEngine.from_config()
+    reasons = engine.evaluate(stubs, duplicates=set_of_names)  # {name: reason or None}
+    for rule in engine.rules:
+        print(rule.reason, rule.hits, rule.seconds)
+"""
+
+import json
+import sys
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from keyword_matcher import get_matcher
+
+RULES_CONFIG = Path(__file__).parent / "archive-rules.config.json"
+PRIORITY_RANK = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+
+Mask = List[bool]
+
+
+def _text(value) -> str:
+    return sys.intern(value.lower()) if isinstance(value, str) else ""
+
+
+def _date_ordinal(value) -> Optional[int]:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+class Columns:
+    """Column-oriented view of a batch of stubs."""
+
+    def __init__(self, stubs: Dict[str, Dict], duplicates: Set[str]):
+        self.names = sorted(stubs)
+        rows = [stubs[name] for name in self.names]
+        contexts = [row.get("context") if isinstance(row.get("context"), dict) else {} for row in rows]
+        descriptions = [row.get("description") if isinstance(row.get("description"), str) else "" for row in rows]
+
+        self.data = {
+            "name": [name.lower() for name in self.names],
+            "status": [_text(row.get("status")) for row in rows],
+            "category": [_text(row.get("category")) for row in rows],
+            "priority": [PRIORITY_RANK.get(_text(row.get("priority"))) for row in rows],
+            "context_status": [_text(context.get("status")) for context in contexts],
+            "description": [description.lower() for description in descriptions],
+            "description_length": [len(description.strip()) for description in descriptions],
+            "created": [_date_ordinal(row.get("created")) for row in rows],
+            "duplicate": [name in duplicates for name in self.names],
+        }
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def column(self, field: str) -> List:
+        if field not in self.data:
+            raise ValueError(f"Unknown rule field: {field}")
+        return self.data[field]
+
+
+class Rule:
+    def __init__(self, reason: str, condition: Callable[[Columns], Mask]):
+        self.reason = reason
+        self.condition = condition
+        self.hits = 0
+        self.seconds = 0.0
+
+
+class RuleEngine:
+    def __init__(self, rules: List[Rule], today: Optional[date] = None):
+        self.rules = rules
+        self.today = today or date.today()
+        self.relative_cutoffs: List[Tuple[str, int]] = []  # (field, ordinal) of older_than_days conditions
+
+    @classmethod
+    def from_config(cls, path: Path = RULES_CONFIG, today: Optional[date] = None) -> "RuleEngine":
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+
+        engine = cls([], today=today)
+        engine.rules = [Rule(rule["reason"], engine.compile(rule["when"])) for rule in config["rules"]]
+        return engine
+
+    def compile(self, spec: Dict) -> Callable[[Columns], Mask]:
+        """Compile a condition spec into a function returning a mask over all rows."""
+        if "all" in spec or "any" in spec:
+            combine = all if "all" in spec else any
+            parts = [self.compile(part) for part in spec.get("all", spec.get("any"))]
+            return lambda cols: [combine(values) for values in zip(*(part(cols) for part in parts))] \
+                if parts else [combine(()) for _ in range(len(cols))]
+
+        if "not" in spec:
+            inner = self.compile(spec["not"])
+            return lambda cols: [not value for value in inner(cols)]
+
+        field = spec["field"]
+
+        if "in" in spec or "equals" in spec:
+            values = spec["in"] if "in" in spec else [spec["equals"]]
+            if field == "priority":
+                values = [PRIORITY_RANK[value] for value in values]
+            allowed = frozenset(sys.intern(v) if isinstance(v, str) else v for v in values)
+            return lambda cols: [value in allowed for value in cols.column(field)]
+
+        if "contains_any" in spec:
+            needles = [needle.lower() for needle in spec["contains_any"]]
+            return lambda cols: [any(n in value for n in needles) for value in cols.column(field)]
+
+        if "keywords" in spec:
+            matcher, group = get_matcher("archive"), spec["keywords"]
+            return lambda cols: [matcher.matches(value, group) for value in cols.column(field)]
+
+        if "less_than" in spec:
+            limit = spec["less_than"]
+            return lambda cols: [value is not None and value < limit for value in cols.column(field)]
+
+        if "before" in spec or "older_than_days" in spec:
+            if "before" in spec:
+                cutoff = datetime.strptime(spec["before"], "%Y-%m-%d").toordinal()
+            else:
+                cutoff = self.today.toordinal() - spec["older_than_days"]
+                self.relative_cutoffs.append((field, cutoff))
+            return lambda cols: [value is not None and value < cutoff for value in cols.column(field)]
+
+        raise ValueError(f"Unknown rule condition: {spec}")
+
+    def date_key(self, stub: Dict) -> List[bool]:
+        """
+        Outcome of every older_than_days comparison for one stub: the only part
+        of a verdict that changes with the date (cache verdicts on it, not on today)
+        """
+        key = []
+        for field, cutoff in self.relative_cutoffs:
+            value = _date_ordinal(stub.get(field))
+            key.append(value is not None and value < cutoff)
+        return key
+
+    def evaluate(self, stubs: Dict[str, Dict], duplicates: Set[str] = frozenset()) -> Dict[str, Optional[str]]:
+        """{name: reason of the first matching rule, or None} for a batch of stubs."""
+        cols = Columns(stubs, duplicates)
+        reasons: List[Optional[str]] = [None] * len(cols)
+
+        for rule in self.rules:
+            start = time.perf_counter()
+            mask = rule.condition(cols)
+            for i, matched in enumerate(mask):
+                if matched and reasons[i] is None:
+                    reasons[i] = rule.reason
+                    rule.hits += 1
+            rule.seconds += time.perf_counter() - start
+
+        return dict(zip(cols.names, reasons))
@@ -1,68 +1,69 @@
 #!/usr/bin/env python3
 """
-Assign 'unknown' target_project to stubs that couldn't be inferred
+Assign target_project to stubs that couldn't be inferred
+
+Every stub still missing target_project is classified by the TF-IDF model
+trained on manually labeled stubs (target_classifier.py). Confident predictions
+are assigned with target_source 'classifier'; only stubs below --min-confidence
+fall back to 'unknown'.
 """
 
-import json
+import argparse
 from pathlib import Path
 
-# Stubs that couldn't be inferred (from previous run)
-UNKNOWN_STUBS = [
-    "ai-video-gen",
-    "coderef-directory-rename",
-    "coderef-tracking-api-mvp",
-    "connection-to-all-llm",
-    "consolidate-project-directories",
-    "git-libraries",
-    "mcp-config-investigation",
-    "mcp-docs-workflow-refactor",
-    "mcp-integrations",
-    "mcp-usage-tracker",
-    "organize-and-consolidate",
-    "railway-config",
-    "remove-utility-personas",
-    "rename-start-feature-command",
-    "reorganize-gits-projects",
-    "track-and-note-commands",
-    "work-order-folder-rename"
-]
+from stub_catalog import StubCatalog
+from target_classifier import DEFAULT_MIN_CONFIDENCE, load_classifier
 
-def assign_unknown():
-    """Assign 'unknown' to stubs missing target_project"""
+def assign_unknown(min_confidence: float = DEFAULT_MIN_CONFIDENCE):
+    """Classify stubs missing target_project, assigning 'unknown' when unsure"""
     project_root = Path(__file__).parent
     working_dir = project_root / "coderef" / "working"
 
-    print("Assigning 'unknown' Target Projects")
+    catalog = StubCatalog(working_dir)
+    catalog.load()
+    classifier = load_classifier(catalog)
+
+    print("Assigning Target Projects (classifier, 'unknown' fallback)")
     print("=" * 60)
 
+    classified = 0
     updated = 0
+    batch = catalog.batch()
 
-    for stub_name in UNKNOWN_STUBS:
-        stub_path = working_dir / stub_name / "stub.json"
-
-        if not stub_path.exists():
-            print(f"[SKIP] {stub_name} - stub.json not found")
-            continue
-
-        with open(stub_path, 'r', encoding='utf-8') as f:
-            stub = json.load(f)
-
+    for stub_name, stub in catalog.items():
         # Check if already has target_project
         if "target_project" in stub and stub["target_project"]:
-            print(f"[SKIP] {stub_name} - already has target: {stub['target_project']}")
             continue
 
-        # Assign 'unknown'
-        stub["target_project"] = "unknown"
+        predicted, confidence = classifier.predict(stub)
 
-        with open(stub_path, 'w', encoding='utf-8') as f:
-            json.dump(stub, f, indent=2, ensure_ascii=False)
+        if predicted and confidence >= min_confidence:
+            stub["target_project"] = predicted
+            stub["target_source"] = "classifier"  # never used to train the classifier
+            print(f"[CLASSIFIED] {stub_name} -> {predicted} (confidence {confidence:.2f})")
+            classified += 1
+        else:
+            # Assign 'unknown'
+            stub["target_project"] = "unknown"
+            print(f"[UPDATED] {stub_name} -> unknown (confidence {confidence:.2f})")
+            updated += 1
 
-        print(f"[UPDATED] {stub_name} -> unknown")
-        updated += 1
+        batch.save(stub_name, stub, ensure_ascii=False)
+
+    batch.commit()
+    catalog.flush()
 
     print("\n" + "=" * 60)
-    print(f"[COMPLETE] Assigned 'unknown' to {updated} stubs")
+    print(f"[COMPLETE] Classified {classified} stubs, assigned 'unknown' to {updated} stubs")
 
 if __name__ == "__main__":
-    assign_unknown()
+    parser = argparse.ArgumentParser(description="Assign target_project to stubs that couldn't be inferred")
+    parser.add_argument(
+        "--min-confidence",
+        type=float,
+        default=DEFAULT_MIN_CONFIDENCE,
+        help=f"Minimum classifier confidence to assign a predicted target (default: {DEFAULT_MIN_CONFIDENCE})"
+    )
+    args = parser.parse_args()
+
+    assign_unknown(args.min_confidence)
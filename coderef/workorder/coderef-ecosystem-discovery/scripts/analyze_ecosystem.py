@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Analyze the CodeRef ecosystem in a single pass
+Loads every server's .coderef artifacts once into the shared EcosystemModel,
+then runs all five report generators against it:
+DEPENDENCIES.md, ECOSYSTEM-ARCHITECTURE.md, SHARED-CODE.md,
+REFACTOR-TARGETS.md and PATTERNS-ANALYSIS.md
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import generate_dependencies
+import generate_ecosystem_diagram
+import generate_patterns_analysis
+import generate_refactor_targets
+import generate_shared_code
+from ecosystem_model import MCP_ROOT, EcosystemModel
+
+OUTPUT_DIR = Path(__file__).parent.parent
+
+def render_dependencies(model):
+    return generate_dependencies.generate_markdown(generate_dependencies.build_dependency_matrix(model))
+
+def render_architecture(model):
+    dependencies = generate_ecosystem_diagram.build_dependency_graph(model)
+    mermaid = generate_ecosystem_diagram.generate_mermaid(dependencies)
+    return generate_ecosystem_diagram.generate_markdown(mermaid, dependencies)
+
+def render_shared_code(model):
+    return generate_shared_code.generate_markdown(generate_shared_code.find_duplicates(model))
+
+def render_refactor_targets(model):
+    return generate_refactor_targets.generate_markdown(generate_refactor_targets.find_high_complexity(model))
+
+def render_patterns(model):
+    return generate_patterns_analysis.generate_markdown(generate_patterns_analysis.analyze_patterns(model))
+
+REPORTS = [
+    ("DEPENDENCIES.md", render_dependencies),
+    ("ECOSYSTEM-ARCHITECTURE.md", render_architecture),
+    ("SHARED-CODE.md", render_shared_code),
+    ("REFACTOR-TARGETS.md", render_refactor_targets),
+    ("PATTERNS-ANALYSIS.md", render_patterns),
+]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate all ecosystem reports from one load of the server artifacts")
+    parser.add_argument("--mcp-root", type=Path, default=MCP_ROOT, help=f"MCP servers root (default: {MCP_ROOT})")
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR, help="Where to write the reports")
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=1,
+        help="Worker processes for loading servers in parallel (0 = one per CPU, default: 1)"
+    )
+    args = parser.parse_args()
+
+    print("Loading ecosystem artifacts...")
+    start = time.perf_counter()
+    model = EcosystemModel.load(args.mcp_root, jobs=args.jobs)
+    print(f"   Loaded {len(model.servers)} servers in {time.perf_counter() - start:.2f}s")
+
+    for filename, render in REPORTS:
+        output_path = args.output_dir / filename
+        output_path.write_text(render(model), encoding='utf-8')
+        print(f"✅ Generated {output_path}")
@@ -1,30 +1,109 @@
 #!/usr/bin/env python3
 """
 Copy graph.json exports from all servers to workorder exports/ folder
+Each graph is also streamed (graph_stream.py) into validated, size-bounded
+JSON Lines shards with a manifest, and node/edge counts go into the README
 """
 
+import argparse
+import json
+import os
 import shutil
 from pathlib import Path
 
-# Server paths
-MCP_ROOT = Path("C:/Users/willh/.mcp-servers")
-SERVERS = [
-    "coderef-context",
-    "coderef-docs",
-    "coderef-personas",
-    "coderef-workflow",
-    "coderef-testing",
-    "papertrail",
-    "archived/coderef-mcp"
-]
-
-def copy_graph_exports():
-    """Copy graph.json from each server to exports/ folder"""
-    output_dir = Path(__file__).parent.parent / "exports"
+from ecosystem_model import MCP_ROOT, SERVERS
+from graph_stream import STREAMED_KEYS, GraphFormatError, iter_graph, validate_element
+
+OUTPUT_DIR = Path(__file__).parent.parent / "exports"
+SHARD_BYTES = 8 * 1024 * 1024  # max size of one shard file
+MAX_REPORTED_INVALID = 5  # invalid elements printed per server
+
+class ShardWriter:
+    """Writes one JSON object per line, starting a new file before SHARD_BYTES is exceeded"""
+
+    def __init__(self, shard_dir: Path, kind: str, shard_bytes: int = SHARD_BYTES):
+        self.shard_dir = shard_dir
+        self.kind = kind
+        self.shard_bytes = shard_bytes
+        self.shards = []  # [{"file", "count", "bytes"}]
+        self.f = None
+
+    def write(self, element):
+        line = (json.dumps(element, ensure_ascii=False, separators=(",", ":")) + "\n").encode('utf-8')
+        current = self.shards[-1] if self.shards else None
+
+        # An element larger than shard_bytes still gets a shard of its own
+        if current is None or (current["count"] and current["bytes"] + len(line) > self.shard_bytes):
+            self.close()
+            current = {"file": f"{self.kind}-{len(self.shards) + 1:04d}.jsonl", "count": 0, "bytes": 0}
+            self.shards.append(current)
+            self.f = open(self.shard_dir / current["file"], 'wb')
+
+        self.f.write(line)
+        current["count"] += 1
+        current["bytes"] += len(line)
+
+    def close(self):
+        if self.f is not None:
+            self.f.close()
+            self.f = None
+
+def shard_graph(graph_file: Path, shard_dir: Path, shard_bytes: int = SHARD_BYTES):
+    """Stream graph_file into shard_dir; returns the manifest (counts, shards, invalid elements)"""
+    tmp_dir = shard_dir.with_name(shard_dir.name + ".tmp")
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+
+    writers = {kind: ShardWriter(tmp_dir, kind, shard_bytes) for kind in STREAMED_KEYS}
+    manifest = {
+        "source": str(graph_file),
+        "meta": {},
+        "counts": {kind: 0 for kind in STREAMED_KEYS},
+        "invalid": {kind: 0 for kind in STREAMED_KEYS},
+        "shards": {kind: writers[kind].shards for kind in STREAMED_KEYS},
+    }
+
+    try:
+        for kind, item in iter_graph(graph_file):
+            if kind == "meta":
+                key, value = item
+                # Only small top-level values are kept; anything else is summarized
+                manifest["meta"][key] = value if not isinstance(value, (list, dict)) else f"<{type(value).__name__} of {len(value)}>"
+                continue
+
+            problem = validate_element(kind, item)
+            if problem:
+                manifest["invalid"][kind] += 1
+                if sum(manifest["invalid"].values()) <= MAX_REPORTED_INVALID:
+                    print(f"[WARN]   {graph_file.name}: skipping invalid {kind[:-1]} #{manifest['counts'][kind] + manifest['invalid'][kind]}: {problem}")
+                continue
+
+            writers[kind].write(item)
+            manifest["counts"][kind] += 1
+    except (GraphFormatError, UnicodeDecodeError) as e:
+        for writer in writers.values():
+            writer.close()
+        shutil.rmtree(tmp_dir)
+        raise GraphFormatError(f"{graph_file}: {e}") from None
+
+    for writer in writers.values():
+        writer.close()
+
+    with open(tmp_dir / "manifest.json", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    if shard_dir.exists():
+        shutil.rmtree(shard_dir)
+    os.replace(tmp_dir, shard_dir)
+    return manifest
+
+def copy_graph_exports(output_dir: Path = OUTPUT_DIR, shard_bytes: int = SHARD_BYTES):
+    """Copy graph.json from each server to exports/ folder and shard it"""
     output_dir.mkdir(exist_ok=True)
 
-    copied = []
+    copied = {}  # {server: manifest}
     missing = []
+    invalid = {}  # {server: error}
 
     for server in SERVERS:
         server_path = MCP_ROOT / server
@@ -39,13 +118,21 @@ def copy_graph_exports():
         safe_server_name = server.replace("/", "-")
         dest_file = output_dir / f"graph-{safe_server_name}.json"
 
+        try:
+            manifest = shard_graph(graph_file, output_dir / f"graph-{safe_server_name}", shard_bytes)
+        except GraphFormatError as e:
+            print(f"[WARN] Skipping {server}: invalid graph.json ({e})")
+            invalid[server] = str(e)
+            continue
+
         shutil.copy2(graph_file, dest_file)
-        copied.append(server)
-        print(f"[OK] Copied {server} -> {dest_file.name}")
+        copied[server] = manifest
+        counts = manifest["counts"]
+        print(f"[OK] Copied {server} -> {dest_file.name} ({counts['nodes']} nodes, {counts['edges']} edges)")
 
-    return copied, missing
+    return copied, missing, invalid
 
-def generate_readme(copied, missing):
+def generate_readme(copied, missing, invalid=None):
     """Generate README for exports/ folder"""
     lines = [
         "# Graph Exports",
@@ -60,6 +147,25 @@ def generate_readme(copied, missing):
         safe_name = server.replace("/", "-")
         lines.append(f"- `graph-{safe_name}.json` - {server}")
 
+    lines.extend([
+        "",
+        "## Summary",
+        "",
+        "| Server | Nodes | Edges | Invalid (skipped) | Shards |",
+        "|--------|-------|-------|-------------------|--------|"
+    ])
+    for server in sorted(copied):
+        manifest = copied[server]
+        counts, skipped = manifest["counts"], sum(manifest["invalid"].values())
+        shards = sum(len(files) for files in manifest["shards"].values())
+        lines.append(f"| {server} | {counts['nodes']} | {counts['edges']} | {skipped} | {shards} |")
+    lines.append(
+        f"| **Total** | {sum(m['counts']['nodes'] for m in copied.values())} "
+        f"| {sum(m['counts']['edges'] for m in copied.values())} "
+        f"| {sum(sum(m['invalid'].values()) for m in copied.values())} "
+        f"| {sum(len(f) for m in copied.values() for f in m['shards'].values())} |"
+    )
+
     if missing:
         lines.extend([
             "",
@@ -69,7 +175,23 @@ def generate_readme(copied, missing):
         for server in sorted(missing):
             lines.append(f"- {server} (graph.json not found)")
 
+    if invalid:
+        lines.extend([
+            "",
+            "## Invalid Exports",
+            ""
+        ])
+        for server in sorted(invalid):
+            lines.append(f"- {server} ({invalid[server]})")
+
     lines.extend([
+        "",
+        "## Shards",
+        "",
+        "Each `graph-<server>/` folder holds the validated graph as JSON Lines",
+        "(`nodes-0001.jsonl`, `edges-0001.jsonl`, ...; one element per line, each file",
+        "bounded in size) plus `manifest.json` with counts, shard list and top-level metadata.",
+        "Nodes without an `id` and edges without `source`/`target` are skipped.",
         "",
         "## Usage",
         "",
@@ -83,14 +205,25 @@ def generate_readme(copied, missing):
     return "\n".join(lines)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Copy, validate and shard graph.json exports from all servers")
+    parser.add_argument(
+        "--shard-mb",
+        type=float,
+        default=SHARD_BYTES / (1024 * 1024),
+        help=f"Maximum shard file size in MB (default: {SHARD_BYTES // (1024 * 1024)})"
+    )
+    args = parser.parse_args()
+
     print("Copying graph.json exports...")
-    copied, missing = copy_graph_exports()
+    copied, missing, invalid = copy_graph_exports(shard_bytes=int(args.shard_mb * 1024 * 1024))
 
-    readme_content = generate_readme(copied, missing)
-    readme_path = Path(__file__).parent.parent / "exports" / "README.md"
+    readme_content = generate_readme(copied, missing, invalid)
+    readme_path = OUTPUT_DIR / "README.md"
     readme_path.write_text(readme_content, encoding='utf-8')
 
     print(f"\n[OK] Copied {len(copied)} graph exports")
     if missing:
         print(f"[WARN] Missing {len(missing)} exports: {', '.join(missing)}")
+    if invalid:
+        print(f"[WARN] Invalid {len(invalid)} exports: {', '.join(invalid)}")
     print(f"[OK] Generated {readme_path}")
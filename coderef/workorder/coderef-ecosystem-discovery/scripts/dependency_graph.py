@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Graph analytics over the server dependency graph
+Tarjan strongly connected components, topological layering of the
+condensation and its transitive reduction; shared by generate_dependencies.py
+and generate_ecosystem_diagram.py
+"""
+
+from typing import Dict, Iterable, List, Set, Tuple
+
+from ecosystem_model import SERVERS
+
+Graph = Dict[str, Set[str]]
+
+class DependencyGraph:
+    """
+    Directed graph server -> servers it imports from
+    All analyses are computed once on construction: SCCs in O(V + E), layers in
+    O(V + E) over the condensation, and the transitive reduction with one
+    reachability bitset per component (O(E) bitset operations)
+    """
+
+    def __init__(self, edges: Dict[str, Iterable[str]], nodes: Iterable[str] = SERVERS):
+        targets = sorted(target for server_targets in edges.values() for target in server_targets)
+        self.nodes: List[str] = list(dict.fromkeys(list(nodes) + sorted(edges) + targets))
+        self.edges: Graph = {node: set(edges.get(node, ())) for node in self.nodes}
+        self.position = {node: i for i, node in enumerate(self.nodes)}
+
+        self.components = self._tarjan()
+        self.component_of = {node: i for i, members in enumerate(self.components) for node in members}
+        self.layers = self._layers()
+        self.reduced_edges = self._transitive_reduction()
+
+    def _tarjan(self) -> List[List[str]]:
+        """Strongly connected components (iterative Tarjan), sinks first"""
+        index: Dict[str, int] = {}
+        lowlink: Dict[str, int] = {}
+        on_stack: Set[str] = set()
+        stack: List[str] = []
+        components: List[List[str]] = []
+
+        for root in self.nodes:
+            if root in index:
+                continue
+
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(sorted(self.edges[root], key=self.position.get)))]
+
+            while work:
+                node, successors = work[-1]
+                for succ in successors:
+                    if succ not in index:
+                        index[succ] = lowlink[succ] = len(index)
+                        stack.append(succ)
+                        on_stack.add(succ)
+                        work.append((succ, iter(sorted(self.edges[succ], key=self.position.get))))
+                        break
+                    if succ in on_stack:
+                        lowlink[node] = min(lowlink[node], index[succ])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+                    if lowlink[node] == index[node]:
+                        members = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            members.append(member)
+                            if member == node:
+                                break
+                        components.append(sorted(members, key=self.position.get))
+
+        return components
+
+    def _component_successors(self, i: int) -> Set[int]:
+        return {
+            self.component_of[target]
+            for node in self.components[i]
+            for target in self.edges[node]
+        } - {i}
+
+    def _layers(self) -> List[List[str]]:
+        """Layer 0 imports nothing; each layer only imports from layers below it"""
+        # Tarjan emits components in reverse topological order, so every
+        # successor's layer is already known when a component is reached
+        depth: List[int] = []
+        for i in range(len(self.components)):
+            depth.append(1 + max((depth[j] for j in self._component_successors(i)), default=-1))
+
+        layers: List[List[str]] = [[] for _ in range(max(depth, default=-1) + 1)]
+        for i, members in enumerate(self.components):
+            layers[depth[i]].extend(members)
+        return [sorted(layer, key=self.position.get) for layer in layers]
+
+    def _transitive_reduction(self) -> List[Tuple[str, str]]:
+        """Edges not implied by longer paths (on the condensation; cycle edges kept)"""
+        reach: List[int] = []  # bitset of components reachable from each component
+        reduced: Set[Tuple[int, int]] = set()
+
+        for i in range(len(self.components)):
+            successors = self._component_successors(i)
+            implied = 0
+            for j in successors:
+                implied |= reach[j]
+            reach.append(implied | sum(1 << j for j in successors))
+            reduced.update((i, j) for j in successors if not implied >> j & 1)
+
+        edges = []
+        for node in self.nodes:
+            for target in sorted(self.edges[node], key=self.position.get):
+                i, j = self.component_of[node], self.component_of[target]
+                if i == j or (i, j) in reduced:
+                    edges.append((node, target))
+
+        # One edge per component pair is enough to keep the reduction's reachability
+        seen: Set[Tuple[int, int]] = set()
+        result = []
+        for node, target in edges:
+            pair = (self.component_of[node], self.component_of[target])
+            if pair[0] == pair[1] or pair not in seen:
+                seen.add(pair)
+                result.append((node, target))
+        return result
+
+    def cycles(self) -> List[List[str]]:
+        """Components with more than one server (or a self-import), as member lists"""
+        return [
+            members for members in self.components
+            if len(members) > 1 or members[0] in self.edges[members[0]]
+        ]
+
+    def cycle_links(self, members: List[str]) -> List[Tuple[str, str, bool]]:
+        """
+        Every import edge inside a cycle group as (source, target, mutual), in
+        node order; a mutual pair (a imports b and b imports a) is listed once
+        """
+        links = []
+        for source in members:
+            for target in sorted(self.edges[source] & set(members), key=self.position.get):
+                mutual = source in self.edges[target]
+                if not mutual or self.position[source] <= self.position[target]:
+                    links.append((source, target, mutual))
+        return links
+
+    @staticmethod
+    def format_link(link: Tuple[str, str, bool]) -> str:
+        source, target, mutual = link
+        return f"{source} {'↔' if mutual and source != target else '→'} {target}"
+
+    def is_cycle_edge(self, source: str, target: str) -> bool:
+        return self.component_of[source] == self.component_of[target]
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Shared in-memory model of the CodeRef MCP ecosystem
+Loads each server's .coderef artifacts (index.json, reports/complexity.json,
+reports/patterns.json) exactly once; all generate_*.py reports read from it
+"""
+
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[4]))  # workspace root: coderef_columns
+from coderef_columns import Table, load_columns
+
+# Server paths
+MCP_ROOT = Path("C:/Users/willh/.mcp-servers")
+SERVERS = [
+    "coderef-context",
+    "coderef-docs",
+    "coderef-personas",
+    "coderef-workflow",
+    "coderef-testing",
+    "papertrail",
+    "archived/coderef-mcp"
+]
+
+# Extra top-level package names per server (e.g. published package names)
+IMPORT_ALIASES: Dict[str, List[str]] = {}
+
+FROM_IMPORT = re.compile(r'^\s*from\s+(\S+)\s+import\b')
+PLAIN_IMPORT = re.compile(r'^\s*import\s+([^\'"]+?)\s*;?\s*$')
+QUOTED_MODULE = re.compile(r'(?:\bfrom|\bimport|\brequire\(|\bimport\()\s*[\'"]([^\'"]+)[\'"]')
+SEGMENT_SPLIT = re.compile(r'[./\\:]+')
+
+def _segment(name: str) -> str:
+    """Normalize a package/path segment: coderef_context == coderef-context"""
+    return name.strip().lower().replace("_", "-")
+
+class ImportResolver:
+    """
+    Maps import statements to the servers they reference
+    Server names and aliases are stored in a segment trie; each import's module
+    paths are tokenized once and matched by longest package prefix, with results
+    memoized per import string
+    """
+
+    def __init__(self, servers: List[str], aliases: Optional[Dict[str, List[str]]] = None):
+        self.trie: Dict = {}
+        self.cache: Dict[str, Set[str]] = {}
+
+        for server in servers:
+            names = [server, server.replace("/", "-")] + list((aliases or {}).get(server, []))
+            for name in names:
+                node = self.trie
+                for segment in SEGMENT_SPLIT.split(name):
+                    node = node.setdefault(_segment(segment), {})
+                node[None] = server
+
+    @staticmethod
+    def modules(statement: str) -> List[str]:
+        """Module paths named by an import statement (aliases dropped)"""
+        quoted = QUOTED_MODULE.findall(statement)
+        if quoted:
+            return quoted
+
+        match = FROM_IMPORT.match(statement)
+        if match:
+            return [match.group(1)]
+
+        match = PLAIN_IMPORT.match(statement)
+        if match:
+            # import a.b as c, d  ->  a.b, d
+            return [part.split(" as ")[0].strip() for part in match.group(1).split(",") if part.strip()]
+
+        return [statement.strip()]
+
+    def _match(self, segments: List[str]) -> Optional[str]:
+        """Longest server name that prefixes segments"""
+        node, found = self.trie, None
+        for segment in segments:
+            node = node.get(segment)
+            if node is None:
+                break
+            found = node.get(None, found)
+        return found
+
+    def resolve_module(self, module: str) -> Optional[str]:
+        """Server a single module path belongs to, or None"""
+        if module.startswith("."):
+            stripped = module.lstrip("./\\")
+            # ".x" / "./x" stay inside the importing server; "../x" may reach a sibling server
+            if not module.startswith("..") or "/" not in module and "\\" not in module:
+                return None
+            return self.resolve_module(stripped)
+
+        segments = [_segment(s) for s in SEGMENT_SPLIT.split(module) if s and s != "@"]
+        segments = [s.lstrip("@") for s in segments]
+
+        if "/" in module or "\\" in module:
+            # Path-like imports may name the server anywhere along the path
+            for start in range(len(segments)):
+                server = self._match(segments[start:])
+                if server:
+                    return server
+            return None
+
+        return self._match(segments)
+
+    def resolve(self, statement: str) -> Set[str]:
+        """All servers an import statement references"""
+        servers = self.cache.get(statement)
+        if servers is None:
+            servers = {server for server in map(self.resolve_module, self.modules(statement)) if server}
+            self.cache[statement] = servers
+        return servers
+
+@dataclass
+class ServerArtifacts:
+    """Everything the reports need from one server's .coderef directory"""
+    name: str
+    has_index: bool = False
+    elements: Sequence[Dict] = field(default_factory=list)  # columnar Table for real index.json files
+    complexity: List[Dict] = field(default_factory=list)
+    patterns: Dict = field(default_factory=dict)
+
+    @property
+    def imports(self) -> Set[str]:
+        """All import statements across the server's elements"""
+        if isinstance(self.elements, Table):
+            return {imp for imp in self.elements.distinct('imports') if isinstance(imp, str)}
+
+        imports = set()
+        for elem in self.elements:
+            if 'imports' in elem and elem['imports']:
+                imports.update(elem['imports'])
+        return imports
+
+def _read_json(path: Path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def load_server(server: str, mcp_root: Path = MCP_ROOT) -> ServerArtifacts:
+    """Load one server's index, complexity and patterns artifacts"""
+    coderef_dir = mcp_root / server / ".coderef"
+    artifacts = ServerArtifacts(name=server)
+
+    index_file = coderef_dir / "index.json"
+    if index_file.exists():
+        artifacts.has_index = True
+        # Columnar form, memory-mapped from the index.json.columns sidecar when current
+        artifacts.elements = load_columns(index_file)
+
+    complexity_file = coderef_dir / "reports" / "complexity.json"
+    if complexity_file.exists():
+        artifacts.complexity = _read_json(complexity_file).get('functions', [])
+
+    patterns_file = coderef_dir / "reports" / "patterns.json"
+    if patterns_file.exists():
+        data = _read_json(patterns_file)
+        artifacts.patterns = data if isinstance(data, dict) else {}
+
+    return artifacts
+
+class EcosystemModel:
+    """Artifacts for every server in SERVERS, in SERVERS order"""
+
+    def __init__(self, servers: Dict[str, ServerArtifacts]):
+        self.servers = servers
+        self._dependencies: Optional[Dict[str, Dict[str, List[str]]]] = None
+        self.resolver = ImportResolver(SERVERS, IMPORT_ALIASES)
+
+    @classmethod
+    def load(cls, mcp_root: Path = MCP_ROOT, jobs: int = 1) -> "EcosystemModel":
+        """Load all servers once (in parallel across servers when jobs > 1; 0 = one per CPU)"""
+        if jobs == 0:
+            jobs = os.cpu_count() or 1
+
+        if jobs > 1:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(SERVERS))) as executor:
+                loaded = list(executor.map(load_server, SERVERS, [mcp_root] * len(SERVERS)))
+        else:
+            loaded = [load_server(server, mcp_root) for server in SERVERS]
+
+        for artifacts in loaded:
+            if not artifacts.has_index:
+                print(f"⚠️ Skipping {Path(artifacts.name).name}: index.json not found")
+
+        return cls({artifacts.name: artifacts for artifacts in loaded})
+
+    def __iter__(self):
+        return iter(self.servers.values())
+
+    def cross_server_imports(self) -> Dict[str, Dict[str, List[str]]]:
+        """{from_server: {to_server: [import statements]}}, computed once"""
+        if self._dependencies is None:
+            dependencies = {}
+            for artifacts in self:
+                for imp in artifacts.imports:
+                    for target_server in sorted(self.resolver.resolve(imp)):
+                        if target_server != artifacts.name:
+                            dependencies.setdefault(artifacts.name, {}).setdefault(target_server, []).append(imp)
+            self._dependencies = dependencies
+        return self._dependencies
@@ -4,60 +4,15 @@ Generate DEPENDENCIES.md - Cross-server import matrix
 Extracts import statements from all 7 servers' index.json files
 """
 
-import json
 from pathlib import Path
-from collections import defaultdict
 
-# Server paths
-MCP_ROOT = Path("C:/Users/willh/.mcp-servers")
-SERVERS = [
-    "coderef-context",
-    "coderef-docs",
-    "coderef-personas",
-    "coderef-workflow",
-    "coderef-testing",
-    "papertrail",
-    "archived/coderef-mcp"
-]
+from dependency_graph import DependencyGraph
+from ecosystem_model import EcosystemModel
 
-def load_index(server_path):
-    """Load index.json from server's .coderef directory"""
-    index_file = server_path / ".coderef" / "index.json"
-    if not index_file.exists():
-        print(f"⚠️ Skipping {server_path.name}: index.json not found")
-        return []
-
-    with open(index_file, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-def extract_imports(elements):
-    """Extract all import statements from elements"""
-    imports = set()
-    for elem in elements:
-        if 'imports' in elem and elem['imports']:
-            imports.update(elem['imports'])
-    return imports
-
-def build_dependency_matrix():
+def build_dependency_matrix(model=None):
     """Build cross-server dependency matrix"""
-    matrix = defaultdict(lambda: defaultdict(list))
-
-    for server in SERVERS:
-        server_path = MCP_ROOT / server
-        elements = load_index(server_path)
-
-        if not elements:
-            continue
-
-        imports = extract_imports(elements)
-
-        # Filter for cross-server imports
-        for imp in imports:
-            for target_server in SERVERS:
-                if target_server != server and target_server.replace("/", "-") in imp:
-                    matrix[server][target_server].append(imp)
-
-    return matrix
+    model = model or EcosystemModel.load()
+    return model.cross_server_imports()
 
 def generate_markdown(matrix):
     """Generate DEPENDENCIES.md content"""
@@ -81,21 +36,35 @@ def generate_markdown(matrix):
 
             lines.append(f"| {from_server} | {to_server} | {import_str} |")
 
-    # Detect circular dependencies
-    lines.extend(["", "## Circular Dependencies", ""])
-    circular = []
-    for from_srv in matrix:
-        for to_srv in matrix[from_srv]:
-            if to_srv in matrix and from_srv in matrix[to_srv]:
-                if (to_srv, from_srv) not in circular:
-                    circular.append((from_srv, to_srv))
+    graph = DependencyGraph(matrix)
 
-    if circular:
-        for srv_a, srv_b in circular:
-            lines.append(f"⚠️ **{srv_a} ↔ {srv_b}** (circular)")
+    # Circular dependencies = strongly connected components of any length
+    lines.extend(["", "## Circular Dependencies", ""])
+    cycles = graph.cycles()
+
+    if cycles:
+        for members in cycles:
+            if len(members) == 2:
+                lines.append(f"⚠️ **{members[0]} ↔ {members[1]}** (circular)")
+            else:
+                lines.append(f"⚠️ **Circular group: {', '.join(members)}** ({len(members)} servers)")
+                for link in graph.cycle_links(members):
+                    lines.append(f"  - {graph.format_link(link)}")
     else:
         lines.append("None detected ✅")
 
+    # Topological layers: each layer only imports from layers above it in this list
+    lines.extend(["", "## Dependency Layers", ""])
+    for depth, layer in enumerate(graph.layers):
+        lines.append(f"{depth}. {', '.join(layer)}")
+
+    # Transitive reduction: direct edges not implied by a longer import chain
+    lines.extend(["", "## Essential Dependencies", "", "Transitive reduction of the import matrix (cycle edges kept).", ""])
+    for from_server, to_server in graph.reduced_edges:
+        lines.append(f"- {from_server} → {to_server}")
+    if not graph.reduced_edges:
+        lines.append("None")
+
     return "\n".join(lines)
 
 if __name__ == "__main__":
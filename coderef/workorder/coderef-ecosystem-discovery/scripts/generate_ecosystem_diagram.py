@@ -4,59 +4,19 @@ Generate ECOSYSTEM-ARCHITECTURE.mmd - Visual ecosystem diagram
 Combines dependency data into single Mermaid diagram
 """
 
-import json
 from pathlib import Path
-from collections import defaultdict
-
-# Server paths
-MCP_ROOT = Path("C:/Users/willh/.mcp-servers")
-SERVERS = [
-    "coderef-context",
-    "coderef-docs",
-    "coderef-personas",
-    "coderef-workflow",
-    "coderef-testing",
-    "papertrail",
-    "archived/coderef-mcp"
-]
-
-def load_index(server_path):
-    """Load index.json from server's .coderef directory"""
-    index_file = server_path / ".coderef" / "index.json"
-    if not index_file.exists():
-        return []
-
-    with open(index_file, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-def extract_imports(elements):
-    """Extract all import statements from elements"""
-    imports = set()
-    for elem in elements:
-        if 'imports' in elem and elem['imports']:
-            imports.update(elem['imports'])
-    return imports
-
-def build_dependency_graph():
-    """Build dependency graph for Mermaid"""
-    dependencies = defaultdict(set)
-
-    for server in SERVERS:
-        server_path = MCP_ROOT / server
-        elements = load_index(server_path)
 
-        if not elements:
-            continue
+from dependency_graph import DependencyGraph
+from ecosystem_model import SERVERS, EcosystemModel
 
-        imports = extract_imports(elements)
-
-        # Find cross-server dependencies
-        for imp in imports:
-            for target_server in SERVERS:
-                if target_server != server and target_server.replace("/", "-") in imp:
-                    dependencies[server].add(target_server)
+def build_dependency_graph(model=None):
+    """Build dependency graph for Mermaid"""
+    model = model or EcosystemModel.load()
+    return {server: set(targets) for server, targets in model.cross_server_imports().items()}
 
-    return dependencies
+def node_id(server):
+    """Mermaid node id for a server (archived/coderef-mcp -> archived-mcp)"""
+    return server.replace("/", "-").replace("coderef-", "")
 
 def generate_mermaid(dependencies):
     """Generate Mermaid diagram"""
@@ -82,12 +42,20 @@ def generate_mermaid(dependencies):
 
     lines.append("")
 
-    # Add dependencies
+    # Add dependencies (edges inside a cycle are drawn thick and red)
+    graph = DependencyGraph(dependencies)
+    cycle_links = []
+    link_index = 0
     for from_server, to_servers in sorted(dependencies.items()):
-        from_id = from_server.replace("/", "-").replace("coderef-", "")
+        from_id = node_id(from_server)
         for to_server in sorted(to_servers):
-            to_id = to_server.replace("/", "-").replace("coderef-", "")
-            lines.append(f"    {from_id} --> {to_id}")
+            to_id = node_id(to_server)
+            if graph.is_cycle_edge(from_server, to_server):
+                lines.append(f"    {from_id} ==> {to_id}")
+                cycle_links.append(str(link_index))
+            else:
+                lines.append(f"    {from_id} --> {to_id}")
+            link_index += 1
 
     # Styling
     lines.extend([
@@ -102,6 +70,16 @@ def generate_mermaid(dependencies):
         "    class archived archived"
     ])
 
+    cycle_nodes = [node_id(server) for members in graph.cycles() for server in members]
+    if cycle_nodes:
+        lines.extend([
+            "",
+            "    %% Circular dependencies",
+            "    classDef cycle stroke:#F44336,stroke-width:3px",
+            f"    class {','.join(cycle_nodes)} cycle",
+            f"    linkStyle {','.join(cycle_links)} stroke:#F44336,stroke-width:3px"
+        ])
+
     return "\n".join(lines)
 
 def generate_markdown(mermaid_diagram, dependencies):
@@ -120,6 +98,7 @@ def generate_markdown(mermaid_diagram, dependencies):
         "- **Core Servers** (Green): Primary functionality - context, docs, workflow",
         "- **Support Servers** (Blue): Secondary features - personas, testing, papertrail",
         "- **Archived** (Gray): Legacy/deprecated servers",
+        "- **Red outline / thick red arrows**: Servers and imports that form a circular dependency",
         "",
         "## Dependency Summary",
         ""
@@ -134,6 +113,19 @@ def generate_markdown(mermaid_diagram, dependencies):
         targets = sorted(dependencies[server])
         lines.append(f"- **{server}** → {', '.join(targets)}")
 
+    graph = DependencyGraph(dependencies)
+
+    lines.extend(["", "## Circular Dependencies", ""])
+    for members in graph.cycles():
+        links = ", ".join(graph.format_link(link) for link in graph.cycle_links(members))
+        lines.append(f"- ⚠️ {', '.join(members)} ({links})")
+    if not graph.cycles():
+        lines.append("None detected ✅")
+
+    lines.extend(["", "## Dependency Layers", ""])
+    for depth, layer in enumerate(graph.layers):
+        lines.append(f"- **Layer {depth}:** {', '.join(layer)}")
+
     return "\n".join(lines)
 
 if __name__ == "__main__":
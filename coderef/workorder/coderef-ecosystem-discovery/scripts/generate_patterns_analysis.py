@@ -4,42 +4,14 @@ Generate PATTERNS-ANALYSIS.md - Pattern inconsistency detection
 Compares patterns.json files across servers
 """
 
-import json
 from pathlib import Path
-from collections import defaultdict
-
-# Server paths
-MCP_ROOT = Path("C:/Users/willh/.mcp-servers")
-SERVERS = [
-    "coderef-context",
-    "coderef-docs",
-    "coderef-personas",
-    "coderef-workflow",
-    "coderef-testing",
-    "papertrail",
-    "archived/coderef-mcp"
-]
-
-def load_patterns(server_path):
-    """Load patterns.json from .coderef/reports/"""
-    patterns_file = server_path / ".coderef" / "reports" / "patterns.json"
-    if not patterns_file.exists():
-        return {}
-
-    with open(patterns_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-        return data if isinstance(data, dict) else {}
-
-def analyze_patterns():
-    """Compare patterns across servers"""
-    all_patterns = {}
 
-    for server in SERVERS:
-        server_path = MCP_ROOT / server
-        patterns = load_patterns(server_path)
-        all_patterns[server] = patterns
+from ecosystem_model import SERVERS, EcosystemModel
 
-    return all_patterns
+def analyze_patterns(model=None):
+    """Compare patterns across servers"""
+    model = model or EcosystemModel.load()
+    return {artifacts.name: artifacts.patterns for artifacts in model}
 
 def compare_error_handling(all_patterns):
     """Compare error handling patterns"""
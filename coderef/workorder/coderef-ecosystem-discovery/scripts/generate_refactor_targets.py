@@ -4,40 +4,18 @@ Generate REFACTOR-TARGETS.md - High-complexity code analysis
 Aggregates complexity metrics from all servers
 """
 
-import json
 from pathlib import Path
 
-# Server paths
-MCP_ROOT = Path("C:/Users/willh/.mcp-servers")
-SERVERS = [
-    "coderef-context",
-    "coderef-docs",
-    "coderef-personas",
-    "coderef-workflow",
-    "coderef-testing",
-    "papertrail",
-    "archived/coderef-mcp"
-]
-
-def load_complexity_report(server_path):
-    """Load complexity report from .coderef/reports/"""
-    complexity_file = server_path / ".coderef" / "reports" / "complexity.json"
-    if not complexity_file.exists():
-        return []
-
-    with open(complexity_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-        return data.get('functions', [])
-
-def find_high_complexity():
+from ecosystem_model import EcosystemModel
+
+def find_high_complexity(model=None):
     """Find functions with high cyclomatic/cognitive complexity"""
+    model = model or EcosystemModel.load()
     high_complexity = []
 
-    for server in SERVERS:
-        server_path = MCP_ROOT / server
-        functions = load_complexity_report(server_path)
-
-        for func in functions:
+    for artifacts in model:
+        server = artifacts.name
+        for func in artifacts.complexity:
             cyclomatic = func.get('cyclomatic_complexity', 0)
             cognitive = func.get('cognitive_complexity', 0)
 
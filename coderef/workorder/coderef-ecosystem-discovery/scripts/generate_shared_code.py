@@ -4,41 +4,19 @@ Generate SHARED-CODE.md - Duplicated code analysis
 Finds functions/classes with same names across servers
 """
 
-import json
 from pathlib import Path
 from collections import defaultdict
 
-# Server paths
-MCP_ROOT = Path("C:/Users/willh/.mcp-servers")
-SERVERS = [
-    "coderef-context",
-    "coderef-docs",
-    "coderef-personas",
-    "coderef-workflow",
-    "coderef-testing",
-    "papertrail",
-    "archived/coderef-mcp"
-]
-
-def load_index(server_path):
-    """Load index.json from server's .coderef directory"""
-    index_file = server_path / ".coderef" / "index.json"
-    if not index_file.exists():
-        print(f"⚠️ Skipping {server_path.name}: index.json not found")
-        return []
-
-    with open(index_file, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-def find_duplicates():
+from ecosystem_model import EcosystemModel
+
+def find_duplicates(model=None):
     """Find functions/classes with same names across servers"""
+    model = model or EcosystemModel.load()
     name_to_servers = defaultdict(list)
 
-    for server in SERVERS:
-        server_path = MCP_ROOT / server
-        elements = load_index(server_path)
-
-        for elem in elements:
+    for artifacts in model:
+        server = artifacts.name
+        for elem in artifacts.elements:
             # Skip dependency packages (not our code)
             file_path = elem.get('file', '')
             if any(x in file_path for x in ['.venv', 'node_modules', '__pycache__', 'site-packages']):
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Streaming reader for .coderef/exports/graph.json
+Yields the elements of the top-level "nodes" and "edges" arrays one at a time
+from a bounded read buffer, so memory stays constant regardless of graph size
+(only the current element is held, never the whole array)
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Iterator, Optional, Tuple
+
+CHUNK_SIZE = 1 << 20  # characters read per refill
+STREAMED_KEYS = ("nodes", "edges")
+
+class GraphFormatError(ValueError):
+    """graph.json is not a JSON object or is malformed"""
+
+class JsonStream:
+    """Incremental JSON tokenizer over a text file: whitespace, punctuation and whole values"""
+
+    def __init__(self, f, chunk_size: int = CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.consumed = 0  # characters dropped from the front of buf
+
+    def fill(self, size: Optional[int] = None) -> bool:
+        """Append more input; False at end of file"""
+        if self.eof:
+            return False
+        chunk = self.f.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.consumed += self.pos
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at end of input)"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf) or not self.fill():
+                return self.buf[self.pos:self.pos + 1]
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise self.error(f"expected {' or '.join(repr(c) for c in chars)}, found {char or 'end of file'!r}")
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        """Decode one complete JSON value, reading more input until it is whole"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A value ending exactly at the buffer edge may be a truncated number
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise self.error(e.msg) from None
+            # Grow geometrically so one large value is not re-decoded per chunk
+            self.fill(max(self.chunk_size, len(self.buf) - self.pos))
+
+    def error(self, message: str) -> GraphFormatError:
+        return GraphFormatError(f"{message} at character {self.consumed + self.pos}")
+
+def iter_graph(path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, Any]]:
+    """
+    Stream a graph export in file order
+    Yields ("nodes", node) / ("edges", edge) for each array element and
+    ("meta", (key, value)) for any other top-level key
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        stream = JsonStream(f, chunk_size)
+        stream.expect("{")
+        if stream.peek() == "}":
+            stream.pos += 1
+        else:
+            while True:
+                key = stream.value()
+                if not isinstance(key, str):
+                    raise stream.error("expected an object key")
+                stream.expect(":")
+
+                if key in STREAMED_KEYS and stream.peek() == "[":
+                    stream.pos += 1
+                    if stream.peek() == "]":
+                        stream.pos += 1
+                    else:
+                        while True:
+                            yield key, stream.value()
+                            if stream.expect(",]") == "]":
+                                break
+                else:
+                    yield "meta", (key, stream.value())
+
+                if stream.expect(",}") == "}":
+                    break
+
+        if stream.peek():
+            raise stream.error("unexpected data after the graph object")
+
+def validate_element(kind: str, element: Any) -> Optional[str]:
+    """Reason a node/edge is invalid, or None"""
+    if not isinstance(element, dict):
+        return f"{kind[:-1]} is not an object"
+    if kind == "nodes":
+        if not isinstance(element.get("id"), (str, int)) or isinstance(element.get("id"), bool):
+            return "node without a string/integer id"
+    else:
+        for end in ("source", "target"):
+            if not isinstance(element.get(end), (str, int)) or isinstance(element.get(end), bool):
+                return f"edge without a string/integer {end}"
+    return None
@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+CodeRef Columns - Compact columnar loader for .coderef/index.json and graph.json.
+
+Lists of element dicts (index.json, graph.json "nodes"/"edges") are converted
+into columns: every string value is dictionary-encoded against one interned
+string table (so repeated types and file paths are stored once), numbers and
+booleans live in typed arrays, and string lists (imports, exports) are stored
+as offsets into one id array. Values that don't fit their column's type are
+kept per row as-is, so rows round-trip exactly.
+
+The columns are cached next to the source as a binary sidecar
+(index.json -> index.json.columns) keyed by the source's size and mtime; later
+loads memory-map the sidecar instead of re-parsing the JSON.
+
+Usage:
+    from coderef_columns import load_columns
+
+    elements = load_columns(Path(".coderef/index.json"))   # Table of element dicts
+    elements[0], len(elements), elements.distinct("imports"), elements.where("type", "function")
+
+    graph = load_columns(Path(".coderef/exports/graph.json"))  # {"nodes": Table, "edges": Table, ...}
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+SIDECAR_SUFFIX = ".columns"
+FORMAT_VERSION = 1
+MAGIC = b"CRCOLS\x00\x01"
+ALIGN = 8
+TYPECODES = {"str": "I", "strlist": "I", "int": "q", "float": "d", "bool": "b"}
+INT_RANGE = (-2 ** 63, 2 ** 63 - 1)
+
+Section = Any  # array or memoryview over the sidecar
+
+
+def sidecar_path(path: Path) -> Path:
+    return path.with_name(path.name + SIDECAR_SUFFIX)
+
+
+def _kind(value) -> Optional[str]:
+    """Column type a value can be stored in, or None if it must stay as-is."""
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int" if INT_RANGE[0] <= value <= INT_RANGE[1] else None
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, str):
+        return "str"
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return "strlist"
+    return None
+
+
+def _is_table(value) -> bool:
+    return isinstance(value, list) and bool(value) and all(isinstance(row, dict) for row in value)
+
+
+class StringTable:
+    """Interned strings by id, decoded lazily from a UTF-8 blob."""
+
+    def __init__(self, offsets: Section, blob: Section):
+        self.offsets = offsets
+        self.blob = blob
+        self.decoded: Dict[int, str] = {}
+        self._ids: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        text = self.decoded.get(i)
+        if text is None:
+            text = sys.intern(bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode('utf-8'))
+            self.decoded[i] = text
+        return text
+
+    def find(self, text: str) -> Optional[int]:
+        if self._ids is None:
+            self._ids = {self[i]: i for i in range(len(self))}
+        return self._ids.get(text)
+
+
+class Column:
+    def __init__(self, kind: str, data: Section, present: Optional[Section] = None, offsets: Optional[Section] = None):
+        self.kind = kind
+        self.data = data
+        self.present = present  # per-row 0/1 flags; None when every row has a value
+        self.offsets = offsets
+
+    def has(self, row: int) -> bool:
+        return self.present is None or bool(self.present[row])
+
+    def get(self, row: int, strings: StringTable):
+        if self.kind == "str":
+            return strings[self.data[row]]
+        if self.kind == "strlist":
+            return [strings[i] for i in self.data[self.offsets[row]:self.offsets[row + 1]]]
+        if self.kind == "bool":
+            return bool(self.data[row])
+        return self.data[row]
+
+
+class Table:
+    """Read-only sequence of row dicts backed by columns."""
+
+    def __init__(self, spec: Dict, sections: List[Section], strings: StringTable,
+                 source: Optional[Path] = None, key: Optional[str] = None):
+        self.rows = spec["rows"]
+        self.strings = strings
+        self.source, self.key = source, key
+        self.columns: Dict[str, Column] = {
+            name: Column(col["kind"], sections[col["data"]],
+                         sections[col["present"]] if "present" in col else None,
+                         sections[col["offsets"]] if "offsets" in col else None)
+            for name, col in spec["columns"].items()
+        }
+        self.order = [(name, self.columns.get(name)) for name in spec["keys"]]
+        self.extras = {int(row): values for row, values in spec["extras"].items()}
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.rows))]
+        if index < 0:
+            index += self.rows
+        if not 0 <= index < self.rows:
+            raise IndexError("table index out of range")
+
+        row = {}
+        extra = self.extras.get(index, {})
+        for name, column in self.order:
+            if column is not None and column.has(index):
+                row[name] = column.get(index, self.strings)
+            elif name in extra:
+                row[name] = extra[name]
+        return row
+
+    def __iter__(self) -> Iterator[Dict]:
+        return (self[i] for i in range(self.rows))
+
+    def __reduce__(self):
+        # Sidecar-backed tables are re-mapped on unpickle instead of copied
+        if self.source is not None:
+            return _reopen, (str(self.source), self.key)
+        return list, (list(self),)
+
+    def where(self, name: str, value) -> List[int]:
+        """Indices of rows whose `name` equals value (column scan over ids/numbers)."""
+        column = self.columns.get(name)
+        matches = []
+        if column is not None and column.kind in ("str", "int", "float", "bool") and _kind(value) == column.kind:
+            target = self.strings.find(value) if column.kind == "str" else value
+            if target is not None:
+                matches = [i for i, v in enumerate(column.data) if v == target and column.has(i)]
+        matches.extend(i for i, extra in self.extras.items() if name in extra and extra[name] == value)
+        return sorted(matches)
+
+    def distinct(self, name: str) -> Set:
+        """All distinct values of a column; string-list columns are flattened."""
+        values: Set = set()
+        column = self.columns.get(name)
+        if column is not None:
+            if column.kind == "strlist":
+                values.update(self.strings[i] for i in set(column.data))
+            else:
+                values.update(column.get(i, self.strings) for i in range(self.rows) if column.has(i))
+        for extra in self.extras.values():
+            if name in extra:
+                value = extra[name]
+                values.update(value) if isinstance(value, list) else values.add(value)
+        return values
+
+
+class _Encoder:
+    """Builds column arrays and the string table for one document."""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.strings: List[bytes] = []
+        self.sections: List[array] = []
+
+    def intern(self, text: str) -> int:
+        i = self.ids.get(text)
+        if i is None:
+            i = self.ids[text] = len(self.strings)
+            self.strings.append(text.encode('utf-8'))
+        return i
+
+    def section(self, typecode: str) -> Tuple[int, array]:
+        self.sections.append(array(typecode))
+        return len(self.sections) - 1, self.sections[-1]
+
+    def table(self, rows: List[Dict]) -> Dict:
+        # Each key's column type is its most common value type; other values become extras
+        counts: Dict[str, Counter] = {}
+        for row in rows:
+            for name, value in row.items():
+                counts.setdefault(name, Counter())[_kind(value)] += 1
+        kinds: Dict[str, Optional[str]] = {
+            name: max((kind for kind in counter if kind is not None), key=counter.get, default=None)
+            for name, counter in counts.items()
+        }
+
+        columns, arrays = {}, {}
+        for name, kind in kinds.items():
+            if kind is None:
+                continue
+            data_index, data = self.section(TYPECODES[kind])
+            present_index, present = self.section("b")
+            columns[name] = {"kind": kind, "data": data_index, "present": present_index}
+            arrays[name] = (data, None, present)
+            if kind == "strlist":
+                offsets_index, offsets = self.section("I")
+                offsets.append(0)
+                columns[name]["offsets"] = offsets_index
+                arrays[name] = (data, offsets, present)
+
+        extras: Dict[str, Dict] = {}
+        for r, row in enumerate(rows):
+            for name, spec in columns.items():
+                data, offsets, present = arrays[name]
+                value = row.get(name)
+                fits = name in row and _kind(value) == spec["kind"]
+                present.append(fits)
+
+                if not fits:
+                    if name in row:
+                        extras.setdefault(str(r), {})[name] = value
+                    if offsets is not None:
+                        offsets.append(len(data))
+                    else:
+                        data.append(0)
+                elif spec["kind"] == "str":
+                    data.append(self.intern(value))
+                elif spec["kind"] == "strlist":
+                    data.extend(self.intern(item) for item in value)
+                    offsets.append(len(data))
+                else:
+                    data.append(value)
+
+            for name, value in row.items():
+                if kinds[name] is None:
+                    extras.setdefault(str(r), {})[name] = value
+
+        for name, spec in columns.items():
+            if all(arrays[name][2]):
+                # Every row has a value: drop the flags (the empty section costs nothing)
+                del arrays[name][2][:]
+                del spec["present"]
+
+        return {"rows": len(rows), "keys": list(kinds), "columns": columns, "extras": extras}
+
+    def document(self, document) -> Optional[Dict]:
+        """Structure of a columnized document, or None if there is nothing to columnize."""
+        if _is_table(document):
+            structure = {"table": self.table(document)}
+        elif isinstance(document, dict) and any(_is_table(value) for value in document.values()):
+            structure = {"object": [
+                [key, "table", self.table(value)] if _is_table(value) else [key, "value", value]
+                for key, value in document.items()
+            ]}
+        else:
+            return None
+
+        offsets_index, offsets = self.section("I")
+        offsets.append(0)
+        for encoded in self.strings:
+            offsets.append(offsets[-1] + len(encoded))
+        blob_index, blob = self.section("B")
+        blob.frombytes(b"".join(encoded for encoded in self.strings))
+        structure["strings"] = [offsets_index, blob_index]
+        return structure
+
+
+def _build(structure: Dict, sections: List[Section], source: Optional[Path]):
+    strings = StringTable(*(sections[i] for i in structure["strings"]))
+    if "table" in structure:
+        return Table(structure["table"], sections, strings, source)
+    return {
+        key: Table(value, sections, strings, source, key) if kind == "table" else value
+        for key, kind, value in structure["object"]
+    }
+
+
+def _source_key(path: Path) -> List[int]:
+    stat = path.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _align(n: int) -> int:
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _itemsizes() -> Dict[str, int]:
+    return {tc: array(tc).itemsize for tc in sorted(set(TYPECODES.values()) | {"B"})}
+
+
+def write_sidecar(path: Path, structure: Dict, sections: List[array], source_key: List[int]) -> None:
+    """Write the columns atomically next to the source (best effort)."""
+    layout, offset = [], 0
+    for section in sections:
+        nbytes = len(section) * section.itemsize
+        layout.append([offset, nbytes, section.typecode])
+        offset = _align(offset + nbytes)
+
+    header = json.dumps({
+        "version": FORMAT_VERSION,
+        "source": source_key,
+        "byteorder": sys.byteorder,
+        "itemsizes": _itemsizes(),
+        "sections": layout,
+        "document": structure,
+    }, ensure_ascii=False).encode('utf-8')
+
+    target = sidecar_path(path)
+    tmp_path = target.with_name(target.name + ".tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC + struct.pack('<Q', len(header)) + header)
+            f.write(b"\0" * (_align(f.tell()) - f.tell()))
+            base = f.tell()
+            for (section_offset, _, _), section in zip(layout, sections):
+                f.write(b"\0" * (base + section_offset - f.tell()))
+                section.tofile(f)
+        os.replace(tmp_path, target)
+    except OSError as e:
+        print(f"Warning: Failed to write column cache {target}: {e}")
+
+
+def read_sidecar(path: Path):
+    """Memory-map a valid sidecar for path; None if missing or stale."""
+    try:
+        source_key = _source_key(path)
+        with open(sidecar_path(path), 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        if mapped[:len(MAGIC)] != MAGIC:
+            return None
+        (header_len,) = struct.unpack_from('<Q', mapped, len(MAGIC))
+        start = len(MAGIC) + 8
+        header = json.loads(mapped[start:start + header_len].decode('utf-8'))
+    except (struct.error, ValueError):
+        return None
+
+    if (header.get("version") != FORMAT_VERSION or header.get("source") != source_key
+            or header.get("byteorder") != sys.byteorder or header.get("itemsizes") != _itemsizes()):
+        return None
+
+    view = memoryview(mapped)
+    base = _align(start + header_len)
+    sections = [view[base + offset:base + offset + nbytes].cast(typecode)
+                for offset, nbytes, typecode in header["sections"]]
+    return _build(header["document"], sections, path)
+
+
+def load_columns(path: Path, use_cache: bool = True):
+    """
+    Load a .coderef JSON file in columnar form.
+    Returns a Table for a list of dicts, a dict whose list-of-dict values are
+    Tables for an object, or the plain parsed JSON when nothing is columnizable.
+    """
+    path = Path(path)
+    if use_cache:
+        document = read_sidecar(path)
+        if document is not None:
+            return document
+
+    source_key = _source_key(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        document = json.load(f)
+
+    encoder = _Encoder()
+    structure = encoder.document(document)
+    if structure is None:
+        return document
+    del document
+
+    if use_cache:
+        write_sidecar(path, structure, encoder.sections, source_key)
+        mapped = read_sidecar(path)
+        if mapped is not None:
+            return mapped
+    return _build(structure, encoder.sections, None)
+
+
+def _reopen(source: str, key: Optional[str]):
+    document = load_columns(Path(source))
+    return document[key] if key is not None else document
@@ -2,51 +2,34 @@
 """
 Target Project Inference Script
 Scans all stubs and intelligently assigns target_project based on feature context
+
+With --classifier, stubs that no keyword matches are classified by a TF-IDF model
+trained on manually labeled stubs (target_classifier.py); predictions below
+--min-confidence are left unassigned. Targets set here are tagged with
+target_source (keywords/classifier) so they never become training labels.
 """
 
-import json
-import os
+import argparse
 from pathlib import Path
 from typing import Dict, Optional
 
-# Project inference rules
-PROJECT_KEYWORDS = {
-    "coderef-dashboard": ["dashboard", "widget", "ui", "frontend", "tracking-widget"],
-    "assistant": ["orchestrator", "assistant", "terminal", "workorder-handoff", "stub-"],
-    "scriptboard": ["scriptboard", "clipboard", "companion"],
-    "gridiron": ["gridiron", "nfl", "franchise", "team-page"],
-    "scrapper": ["scrapper", "scraping", "data-collection"],
-    "noted": ["noted", "notes", "markdown"],
-    "coderef-workflow": ["workflow", "create-plan", "execute-plan", "deliverables", "archive-feature"],
-    "coderef-docs": ["docs", "documentation", "foundation-docs", "standards", "changelog"],
-    "coderef-context": ["coderef-context", "context", "analysis", "complexity"],
-    "personas-mcp": ["persona", "agent", "role-context"],
-    "coderef-mcp": ["coderef-mcp", "coderef-system"],
-    "multi-tenant": ["multi-tenant", "saas", "business-dash"],
-    "app-documents": ["app-documents", "documents"]
-}
+from keyword_matcher import get_matcher
+from stub_catalog import StubCatalog
+from target_classifier import DEFAULT_MIN_CONFIDENCE, load_classifier
+
+# Project inference rules: weighted keywords per project live in
+# keywords.config.json ("target_projects"), compiled once into one automaton
+PROJECT_MATCHER = get_matcher("target_projects")
 
 def infer_target_project(feature_name: str, description: str) -> Optional[str]:
     """
     Infer target project based on feature name and description
     Returns project name or None if can't infer
     """
-    text = f"{feature_name} {description}".lower()
-
-    # Check each project's keywords
-    matches = {}
-    for project, keywords in PROJECT_KEYWORDS.items():
-        score = sum(1 for keyword in keywords if keyword in text)
-        if score > 0:
-            matches[project] = score
-
-    if not matches:
-        return None
-
-    # Return project with highest score
-    return max(matches.items(), key=lambda x: x[1])[0]
+    # Highest weighted keyword score wins (config order breaks ties)
+    return PROJECT_MATCHER.best(f"{feature_name} {description}")
 
-def scan_and_infer():
+def scan_and_infer(use_classifier: bool = False, min_confidence: float = DEFAULT_MIN_CONFIDENCE):
     """Scan all stubs and infer missing target_project fields"""
     project_root = Path(__file__).parent
     working_dir = project_root / "coderef" / "working"
@@ -55,29 +38,27 @@ def scan_and_infer():
         print(f"[ERROR] Working directory not found: {working_dir}")
         return
 
-    # Find all stubs
-    stub_files = []
-    for item in working_dir.iterdir():
-        if item.is_dir():
-            stub_file = item / "stub.json"
-            if stub_file.exists():
-                stub_files.append(stub_file)
+    # Load all stubs
+    catalog = StubCatalog(working_dir)
+    total = catalog.load()
+    for stub_file, error in catalog.errors:
+        print(f"[WARN] Failed to read {stub_file}: {error}")
 
     print(f"Target Project Inference")
     print("=" * 60)
-    print(f"\nFound {len(stub_files)} stubs\n")
+    print(f"\nFound {total} stubs\n")
+
+    classifier = load_classifier(catalog) if use_classifier else None
 
     missing_count = 0
     inferred_count = 0
     skipped_count = 0
 
     updates = []
+    batch = catalog.batch()
 
-    for stub_path in stub_files:
-        with open(stub_path, 'r', encoding='utf-8') as f:
-            stub = json.load(f)
-
-        feature_name = stub.get("feature_name", stub_path.parent.name)
+    for name, stub in catalog.items():
+        feature_name = stub.get("feature_name", name)
         has_target = "target_project" in stub and stub["target_project"]
 
         if has_target:
@@ -89,18 +70,27 @@ def scan_and_infer():
         # Infer target project
         description = stub.get("description", "")
         inferred = infer_target_project(feature_name, description)
+        confidence = None
+
+        if not inferred and classifier:
+            predicted, confidence = classifier.predict(stub)
+            if confidence >= min_confidence:
+                inferred = predicted
 
         if inferred:
             stub["target_project"] = inferred
+            # Machine-assigned targets are never used to train the classifier
+            stub["target_source"] = "keywords" if confidence is None else "classifier"
 
-            # Save updated stub
-            with open(stub_path, 'w', encoding='utf-8') as f:
-                json.dump(stub, f, indent=2, ensure_ascii=False)
+            # Stage updated stub (committed with the rest at the end)
+            batch.save(name, stub, ensure_ascii=False)
 
-            rel_path = stub_path.relative_to(project_root)
-            print(f"[INFERRED] {feature_name}")
+            rel_path = catalog.path(name).relative_to(project_root)
+            print(f"[INFERRED] {feature_name}" if confidence is None else f"[CLASSIFIED] {feature_name}")
             print(f"  File: {rel_path}")
             print(f"  Target: {inferred}")
+            if confidence is not None:
+                print(f"  Confidence: {confidence:.2f}")
             print()
 
             inferred_count += 1
@@ -110,16 +100,22 @@ def scan_and_infer():
             })
         else:
             print(f"[SKIPPED] {feature_name}")
-            print(f"  Reason: Could not infer target project")
+            if confidence is None:
+                print(f"  Reason: Could not infer target project")
+            else:
+                print(f"  Reason: Low classifier confidence ({confidence:.2f} < {min_confidence:.2f})")
             print(f"  Description: {description[:80]}...")
             print()
             skipped_count += 1
 
+    batch.commit()
+    catalog.flush()
+
     # Summary
     print("=" * 60)
     print(f"[COMPLETE] Target Project Inference:")
-    print(f"  - Total stubs: {len(stub_files)}")
-    print(f"  - Already had target: {len(stub_files) - missing_count}")
+    print(f"  - Total stubs: {total}")
+    print(f"  - Already had target: {total - missing_count}")
     print(f"  - Missing target: {missing_count}")
     print(f"  - Inferred successfully: {inferred_count}")
     print(f"  - Could not infer: {skipped_count}")
@@ -130,4 +126,18 @@ def scan_and_infer():
             print(f"  - {update['feature']} → {update['target']}")
 
 if __name__ == "__main__":
-    scan_and_infer()
+    parser = argparse.ArgumentParser(description="Infer missing target_project fields")
+    parser.add_argument(
+        "--classifier",
+        action="store_true",
+        help="Classify stubs no keyword matches with the cached TF-IDF model"
+    )
+    parser.add_argument(
+        "--min-confidence",
+        type=float,
+        default=DEFAULT_MIN_CONFIDENCE,
+        help=f"Minimum classifier confidence to assign a target (default: {DEFAULT_MIN_CONFIDENCE})"
+    )
+    args = parser.parse_args()
+
+    scan_and_infer(args.classifier, args.min_confidence)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Keyword Matcher - Weighted multi-keyword matching with an Aho-Corasick automaton.
+
+All keyword sets of a config section are compiled once into a single automaton,
+so one pass over the text yields the hits of every group (overlapping matches
+included, e.g. "docs" inside "foundation-docs"). Keywords and weights live in
+keywords.config.json.
+
+Usage:
+    from keyword_matcher import get_matcher
+
+    matcher = get_matcher("target_projects")
+    matcher.scores("dashboard widget for notes")  # {"coderef-dashboard": 2.0, "noted": 1.0}
+    matcher.best("dashboard widget for notes")    # "coderef-dashboard"
+"""
+
+import json
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+KEYWORDS_CONFIG = Path(__file__).parent / "keywords.config.json"
+
+_matchers: Dict[Tuple[str, str], "KeywordMatcher"] = {}
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over {group: {keyword: weight}}."""
+
+    def __init__(self, groups: Dict[str, Dict[str, float]]):
+        self.groups = list(groups)  # config order breaks ties in best()
+        self.keywords: List[Tuple[str, str, float]] = []  # (group, keyword, weight)
+
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[int]] = [[]]  # keyword ids ending at each state
+
+        for group, keywords in groups.items():
+            for keyword, weight in keywords.items():
+                self._add(len(self.keywords), keyword.lower())
+                self.keywords.append((group, keyword.lower(), float(weight)))
+
+        self._build_fail_links()
+
+    def _add(self, keyword_id: int, keyword: str) -> None:
+        state = 0
+        for char in keyword:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = next_state
+        self.output[state].append(keyword_id)
+
+    def _build_fail_links(self) -> None:
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def matched(self, text: str) -> Set[int]:
+        """Ids of all distinct keywords occurring in text (single pass)."""
+        found = set()
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+
+        return found
+
+    def hits(self, text: str) -> Dict[str, Set[str]]:
+        """{group: matched keywords} for groups with at least one hit."""
+        result: Dict[str, Set[str]] = {}
+        for keyword_id in self.matched(text):
+            group, keyword, _ = self.keywords[keyword_id]
+            result.setdefault(group, set()).add(keyword)
+        return result
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """{group: summed weight of distinct matched keywords}, in config order."""
+        totals: Dict[str, float] = {}
+        for keyword_id in self.matched(text):
+            group, _, weight = self.keywords[keyword_id]
+            totals[group] = totals.get(group, 0.0) + weight
+        return {group: totals[group] for group in self.groups if group in totals}
+
+    def best(self, text: str) -> Optional[str]:
+        """Highest-scoring group (first in config order on ties), or None."""
+        scores = self.scores(text)
+        if not scores:
+            return None
+        return max(scores.items(), key=lambda x: x[1])[0]
+
+    def matches(self, text: str, group: str) -> bool:
+        """True if any keyword of group occurs in text."""
+        return group in self.hits(text)
+
+
+def load_keyword_groups(section: str, path: Path = KEYWORDS_CONFIG) -> Dict[str, Dict[str, float]]:
+    """Read one section of the keyword config as {group: {keyword: weight}}."""
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    groups = {}
+    for group, keywords in config[section].items():
+        if isinstance(keywords, dict):
+            groups[group] = {keyword: float(weight) for keyword, weight in keywords.items()}
+        else:
+            groups[group] = {keyword: 1.0 for keyword in keywords}
+    return groups
+
+
+def get_matcher(section: str, path: Path = KEYWORDS_CONFIG) -> KeywordMatcher:
+    """Compiled matcher for a config section (built once per process)."""
+    key = (section, str(path))
+    if key not in _matchers:
+        _matchers[key] = KeywordMatcher(load_keyword_groups(section, path))
+    return _matchers[key]
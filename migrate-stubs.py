@@ -4,19 +4,17 @@ Stub Migration Script
 Fixes common validation issues in stub.json files:
 1. Convert "status": "stub" → "status": "planning"
 2. Fix date format: ISO 8601 → YYYY-MM-DD
-3. Assign missing stub_id values
+3. Assign missing stub_id values (existing IDs are never changed)
 4. Fix invalid categories to valid enums
 """
 
-import json
+import argparse
 import re
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Tuple
 
-# Valid enums per schema
-VALID_STATUSES = ['planning', 'ready', 'blocked', 'promoted', 'abandoned']
-VALID_CATEGORIES = ['feature', 'enhancement', 'bugfix', 'infrastructure', 'documentation', 'refactor', 'research']
+from stub_catalog import VALID_CATEGORIES, StubCatalog, add_batch_arguments, map_jobs
 
 # Category mapping for invalid values
 CATEGORY_MAPPING = {
@@ -62,8 +60,8 @@ def get_next_stub_id() -> Tuple[str, int]:
 
     return "STUB-084", 84  # Default
 
-def update_projects_md(new_next_id: int):
-    """Update the Next STUB-ID counter in projects.md."""
+def update_projects_md(batch, new_next_id: int):
+    """Stage the Next STUB-ID counter update for projects.md in the batch."""
     projects_md = Path(r'C:\Users\willh\Desktop\assistant\projects.md')
 
     if not projects_md.exists():
@@ -85,12 +83,13 @@ def update_projects_md(new_next_id: int):
         updated
     )
 
-    projects_md.write_text(updated, encoding='utf-8')
+    batch.stage(projects_md, updated)
 
-def migrate_stub(stub_path: Path, stub_id_counter: List[int]) -> Dict[str, List[str]]:
+def migrate_stub(stub: Dict) -> Dict[str, List[str]]:
     """
-    Migrate a single stub.json file.
-    Returns dict of changes made.
+    Migrate a single parsed stub in place.
+    Returns dict of changes made (the caller saves the stub if any were made).
+    Missing stub_ids are assigned by main(), which sees every stub's ID.
     """
     changes = {
         'status_fixed': [],
@@ -101,15 +100,10 @@ def migrate_stub(stub_path: Path, stub_id_counter: List[int]) -> Dict[str, List[
     }
 
     try:
-        # Read stub
-        stub = json.loads(stub_path.read_text(encoding='utf-8'))
-        modified = False
-
         # Fix 1: Status "stub" → "planning"
         if stub.get('status') == 'stub':
             stub['status'] = 'planning'
             changes['status_fixed'].append(f"Changed 'stub' → 'planning'")
-            modified = True
 
         # Fix 2: Date format (created field)
         if 'created' in stub:
@@ -119,15 +113,6 @@ def migrate_stub(stub_path: Path, stub_id_counter: List[int]) -> Dict[str, List[
                 new_date = extract_date_from_iso8601(created)
                 stub['created'] = new_date
                 changes['date_fixed'].append(f"Fixed date: {created} → {new_date}")
-                modified = True
-
-        # Fix 3: Missing stub_id
-        if 'stub_id' not in stub or not stub['stub_id']:
-            next_id = f"STUB-{stub_id_counter[0]:03d}"
-            stub['stub_id'] = next_id
-            changes['stub_id_added'].append(f"Added stub_id: {next_id}")
-            stub_id_counter[0] += 1
-            modified = True
 
         # Fix 4: Invalid categories
         if 'category' in stub:
@@ -137,24 +122,27 @@ def migrate_stub(stub_path: Path, stub_id_counter: List[int]) -> Dict[str, List[
                     new_category = CATEGORY_MAPPING[category]
                     stub['category'] = new_category
                     changes['category_fixed'].append(f"Remapped '{category}' → '{new_category}'")
-                    modified = True
                 else:
                     # Default to 'feature' for unknown categories
                     stub['category'] = 'feature'
                     changes['category_fixed'].append(f"Unknown category '{category}' → 'feature'")
-                    modified = True
-
-        # Save if modified
-        if modified:
-            stub_path.write_text(json.dumps(stub, indent=2), encoding='utf-8')
 
     except Exception as e:
         changes['errors'].append(str(e))
 
     return changes
 
+def migrate_job(stub: Dict) -> Tuple[Dict, Dict[str, List[str]]]:
+    """Pool worker: migrate one stub (stub_ids are handed out by main())."""
+    changes = migrate_stub(stub)
+    return stub, changes
+
 def main():
     """Main migration function."""
+    parser = argparse.ArgumentParser(description="Fix common validation issues in stub.json files")
+    add_batch_arguments(parser)
+    args = parser.parse_args()
+
     print("=" * 80)
     print("STUB MIGRATION SCRIPT")
     print("=" * 80)
@@ -168,11 +156,12 @@ def main():
     # Use list to pass by reference
     stub_id_counter = [next_stub_num]
 
-    # Find all stub.json files
+    # Load all stub.json files, including ones in nested folders
     working_dir = Path(r'C:\Users\willh\Desktop\assistant\coderef\working')
-    stub_files = list(working_dir.glob('**/stub.json'))
+    catalog = StubCatalog(working_dir, recursive=True)
+    stub_count = catalog.load(jobs=args.jobs, pool=args.pool)
 
-    print(f"Found {len(stub_files)} stub.json files")
+    print(f"Found {stub_count + len(catalog.errors)} stub.json files")
     print()
 
     # Track overall stats
@@ -187,14 +176,41 @@ def main():
 
     detailed_log = []
 
-    # Migrate each stub
-    for stub_path in stub_files:
-        feature_name = stub_path.parent.name
-        changes = migrate_stub(stub_path, stub_id_counter)
+    # All stub edits and the counter update are committed together
+    batch = catalog.batch()
+
+    # Stubs that failed to parse
+    for stub_path, error in catalog.errors:
+        total_changes['errors'] += 1
+        detailed_log.append(f"\n{stub_path.parent.name}: ERROR - {error}")
+
+    # IDs already in use are never reassigned or handed out again
+    taken = {stub.get('stub_id') for _, stub in catalog.items()}
+
+    # Migrate stubs (in parallel with --jobs), then merge in sorted order
+    names = catalog.names()
+    results = map_jobs(migrate_job, [catalog.get(name) for name in names], args.jobs, args.pool)
+
+    for feature_name, (stub, changes) in zip(names, results):
+        # Fix 3: Missing stub_id - only stubs without one get the next free ID
+        if not stub.get('stub_id'):
+            while f"STUB-{stub_id_counter[0]:03d}" in taken:
+                stub_id_counter[0] += 1
+            next_id = f"STUB-{stub_id_counter[0]:03d}"
+            stub['stub_id'] = next_id
+            taken.add(next_id)
+            changes['stub_id_added'].append(f"Added stub_id: {next_id}")
+            stub_id_counter[0] += 1
 
         # Check if any changes were made
         has_changes = any(changes[k] for k in ['status_fixed', 'date_fixed', 'stub_id_added', 'category_fixed'])
 
+        if has_changes and not changes['errors']:
+            try:
+                batch.save(feature_name, stub)
+            except Exception as e:
+                changes['errors'].append(str(e))
+
         if has_changes:
             total_changes['files_modified'] += 1
             log_entry = [f"\n{feature_name}:"]
@@ -213,15 +229,23 @@ def main():
 
     # Update projects.md with new counter
     if stub_id_counter[0] > next_stub_num:
-        update_projects_md(stub_id_counter[0])
+        update_projects_md(batch, stub_id_counter[0])
+
+    written = batch.commit()
+    catalog.flush()
+
+    if stub_id_counter[0] > next_stub_num:
         print(f"Updated projects.md: Next STUB-ID -> STUB-{stub_id_counter[0]:03d}")
         print()
+    if written or batch.skipped:
+        print(f"Committed {written} file(s) in one batch ({batch.skipped} unchanged, skipped)")
+        print()
 
     # Print summary
     print("=" * 80)
     print("MIGRATION SUMMARY")
     print("=" * 80)
-    print(f"Files modified: {total_changes['files_modified']}/{len(stub_files)}")
+    print(f"Files modified: {total_changes['files_modified']}/{stub_count}")
     print(f"Status values fixed: {total_changes['status_fixed']}")
     print(f"Date formats fixed: {total_changes['date_fixed']}")
     print(f"Stub IDs added: {total_changes['stub_id_added']}")
@@ -244,7 +268,7 @@ def main():
         "STUB MIGRATION REPORT",
         "=" * 80,
         f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-        f"Total stubs: {len(stub_files)}",
+        f"Total stubs: {stub_count}",
         f"Files modified: {total_changes['files_modified']}",
         "",
         "Changes:",
@@ -257,7 +281,7 @@ def main():
         "Stub ID Counter:",
         f"  - Before: STUB-{next_stub_num:03d}",
         f"  - After: STUB-{stub_id_counter[0]:03d}",
-        f"  - IDs assigned: {stub_id_counter[0] - next_stub_num}",
+        f"  - IDs assigned: {total_changes['stub_id_added']}",
         "",
         "=" * 80,
         "DETAILED CHANGES",
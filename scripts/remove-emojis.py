@@ -9,10 +9,20 @@ Usage:
     python scripts/remove-emojis.py [file_or_directory] [options]
     python scripts/remove-emojis.py C:/Users/willh/Desktop/projects/my-file.md
     python scripts/remove-emojis.py C:/Users/willh/Desktop/projects/my-project --recursive
+    python scripts/remove-emojis.py C:/Users/willh/Desktop/projects/my-project -r --jobs 8
+
+Files are cleaned in a single subn pass; pure-ASCII files are skipped by a byte
+check without decoding, files over STREAM_THRESHOLD are mmapped and cleaned in
+chunks, and changed files are replaced atomically (line endings are preserved).
 """
 
+import codecs
+import mmap
+import os
 import sys
 import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 
@@ -31,6 +41,12 @@ EMOJI_PATTERN = re.compile(
     flags=re.UNICODE
 )
 
+# Emoji run at the very end of a chunk - held back so runs split across chunks count once
+TRAILING_EMOJI_PATTERN = re.compile(EMOJI_PATTERN.pattern + "$", flags=re.UNICODE)
+
+STREAM_THRESHOLD = 8 * 1024 * 1024  # stream files larger than this
+CHUNK_SIZE = 1024 * 1024
+
 
 def remove_emojis(text: str) -> tuple[str, int]:
     """
@@ -39,14 +55,76 @@ def remove_emojis(text: str) -> tuple[str, int]:
     Returns:
         (cleaned_text, emoji_count)
     """
-    # Count emojis
-    emojis = EMOJI_PATTERN.findall(text)
-    count = len(emojis)
+    return EMOJI_PATTERN.subn('', text)
+
+
+def is_ascii(data) -> bool:
+    """Quick byte check: pure-ASCII data cannot contain emojis."""
+    return data.isascii() if isinstance(data, bytes) else all(
+        data[i:i + CHUNK_SIZE].isascii() for i in range(0, len(data), CHUNK_SIZE)
+    )
+
+
+def write_temp(file_path: Path, chunks) -> str:
+    """Write encoded chunks (as they are produced) to a temp file beside file_path."""
+    fd, tmp_path = tempfile.mkstemp(dir=str(file_path.parent), prefix=file_path.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, file_path.stat().st_mode & 0o7777)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path
+
+
+def replace_atomic(file_path: Path, chunks) -> None:
+    """Write encoded chunks to a temp file beside file_path, then swap it in."""
+    tmp_path = write_temp(file_path, chunks)
+    try:
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def stream_text(data):
+    """
+    Decode a large buffer (mmap) chunk by chunk, yielding text pieces.
+    An emoji run at the end of a piece is carried into the next one.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    carry = ''
 
-    # Remove emojis
-    cleaned = EMOJI_PATTERN.sub('', text)
+    for start in range(0, len(data), CHUNK_SIZE):
+        final = start + CHUNK_SIZE >= len(data)
+        text = carry + decoder.decode(data[start:start + CHUNK_SIZE], final)
 
-    return cleaned, count
+        carry = ''
+        if not final:
+            tail = TRAILING_EMOJI_PATTERN.search(text)
+            if tail:
+                text, carry = text[:tail.start()], text[tail.start():]
+        yield text
+
+
+def clean_stream(data, totals: dict):
+    """
+    Yield cleaned utf-8 chunks of a large buffer (mmap) one at a time,
+    adding the emojis removed to totals['emoji_count'].
+    """
+    for text in stream_text(data):
+        cleaned, n = remove_emojis(text)
+        totals['emoji_count'] += n
+        yield cleaned.encode('utf-8')
+
+
+def count_stream(data) -> int:
+    """Count emojis in a large buffer without building any output."""
+    return sum(1 for text in stream_text(data) for _ in EMOJI_PATTERN.finditer(text))
 
 
 def process_file(file_path: Path, dry_run: bool = False) -> dict:
@@ -69,21 +147,49 @@ def process_file(file_path: Path, dry_run: bool = False) -> dict:
     }
 
     try:
-        # Read file
-        content = file_path.read_text(encoding='utf-8')
-
-        # Remove emojis
-        cleaned, count = remove_emojis(content)
-        result['emoji_count'] = count
+        size = file_path.stat().st_size
+
+        if size == 0:
+            result['success'] = True  # Nothing to clean
+        elif size > STREAM_THRESHOLD:
+            # Large file: map it and stream cleaned chunks straight to a temp file
+            tmp_path = None
+            with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if is_ascii(data):
+                    result['success'] = True
+                    return result
+                if dry_run:
+                    result['emoji_count'] = count_stream(data)
+                else:
+                    totals = {'emoji_count': 0}
+                    tmp_path = write_temp(file_path, clean_stream(data, totals))
+                    result['emoji_count'] = totals['emoji_count']
 
-        # Write back if not dry run and emojis were found
-        if not dry_run and count > 0:
-            file_path.write_text(cleaned, encoding='utf-8')
+            # Swap only after the map is closed (Windows cannot replace a mapped file)
+            if tmp_path is not None:
+                if result['emoji_count'] > 0:
+                    try:
+                        os.replace(tmp_path, file_path)
+                    except BaseException:
+                        os.unlink(tmp_path)
+                        raise
+                else:
+                    os.unlink(tmp_path)
             result['success'] = True
-        elif count == 0:
-            result['success'] = True  # No changes needed
         else:
-            result['success'] = True  # Dry run
+            data = file_path.read_bytes()
+            if is_ascii(data):
+                result['success'] = True  # Fast path: no emojis possible
+                return result
+
+            # Remove emojis in one pass
+            cleaned, count = remove_emojis(data.decode('utf-8'))
+            result['emoji_count'] = count
+
+            # Write back only if not dry run and emojis were found
+            if not dry_run and count > 0:
+                replace_atomic(file_path, [cleaned.encode('utf-8')])
+            result['success'] = True
 
     except Exception as e:
         result['error'] = str(e)
@@ -91,8 +197,12 @@ def process_file(file_path: Path, dry_run: bool = False) -> dict:
     return result
 
 
+def _process_file_job(args: tuple) -> dict:
+    return process_file(*args)
+
+
 def process_directory(dir_path: Path, recursive: bool = False, dry_run: bool = False,
-                     pattern: str = "*.md") -> list:
+                     pattern: str = "*.md", jobs: int = 0) -> list:
     """
     Process all files in a directory.
 
@@ -101,23 +211,25 @@ def process_directory(dir_path: Path, recursive: bool = False, dry_run: bool = F
         recursive: Process subdirectories
         dry_run: Don't write changes
         pattern: File pattern to match (default: *.md)
+        jobs: Worker processes (0 = one per CPU, 1 = serial)
 
     Returns:
-        List of result dictionaries
+        List of result dictionaries (in file discovery order)
     """
-    results = []
-
     if recursive:
         files = dir_path.rglob(pattern)
     else:
         files = dir_path.glob(pattern)
 
-    for file_path in files:
-        if file_path.is_file():
-            result = process_file(file_path, dry_run)
-            results.append(result)
+    work = [(file_path, dry_run) for file_path in files if file_path.is_file()]
 
-    return results
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    if jobs <= 1 or len(work) <= 1:
+        return [process_file(*item) for item in work]
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(work))) as executor:
+        return list(executor.map(_process_file_job, work, chunksize=max(1, len(work) // (jobs * 4))))
 
 
 def print_summary(results: list):
@@ -167,6 +279,12 @@ if __name__ == "__main__":
         default="*.md",
         help="File pattern to match (default: *.md)"
     )
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=0,
+        help="Worker processes for directories (0 = one per CPU, default: 0)"
+    )
 
     args = parser.parse_args()
 
@@ -203,7 +321,7 @@ if __name__ == "__main__":
         else:
             print(f"[ERROR] {path.name}: {result['error']}")
     else:
-        results = process_directory(path, args.recursive, args.dry_run, args.pattern)
+        results = process_directory(path, args.recursive, args.dry_run, args.pattern, args.jobs)
 
         for result in results:
             rel_path = result['path'].relative_to(path)
@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+Stub Catalog - Shared loader for coderef/working/*/stub.json
+
+Loads every stub once and keeps an on-disk snapshot of parsed stubs keyed by
+path, mtime and size, so later runs only re-parse stub.json files that changed.
+Used by archive-stubs.py, migrate-stubs.py, infer-target-projects.py and
+assign-unknown-targets.py instead of each walking coderef/working itself.
+
+Usage:
+    from stub_catalog import StubCatalog
+
+    catalog = StubCatalog()
+    catalog.load()
+    for name, stub in catalog.items():
+        ...
+    catalog.save(name, stub)
+    catalog.flush()
+
+StubCatalog(recursive=True) also finds stub.json files in nested folders; their
+names are paths relative to the working directory (e.g. "group/my-stub").
+
+Transactional writes: stage every edit in a StubBatch and commit() once.
+Staged files are fsynced next to their targets, a journal marks the commit
+point, then each file is swapped in with os.replace. A run that dies after the
+commit point is finished by the next load(); one that dies before it leaves the
+tree untouched. Edits that would not change a file's bytes are skipped.
+
+    batch = catalog.batch()
+    batch.save(name, stub)
+    batch.stage(Path("projects.md"), text)
+    batch.commit()
+
+Batch mode: load(), validate_all() and map_jobs() fan work out over a thread or
+process pool (--jobs/--pool, see add_batch_arguments). Results are merged in
+sorted stub order, so reports match serial runs exactly.
+"""
+
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).parent
+WORKING_DIR = PROJECT_ROOT / "coderef" / "working"
+SNAPSHOT_NAME = ".stub-catalog.json"
+RECURSIVE_SNAPSHOT_NAME = ".stub-catalog-recursive.json"  # recursive catalogs see more stubs
+SNAPSHOT_VERSION = 1
+JOURNAL_NAME = ".stub-batch.journal"
+STAGING_NAME = ".stub-batch.staging"  # staged files of an uncommitted batch, for cleanup
+STAGED_SUFFIX = ".batch"
+
+# Stub schema (see coderef/foundation-docs/SCHEMA.md)
+REQUIRED_FIELDS = ['stub_id', 'feature_name', 'description', 'category', 'priority', 'status', 'created']
+OPTIONAL_FIELDS = ['target_project', 'target_source', 'promoted_to', 'tags', 'notes']
+VALID_STATUSES = ['planning', 'ready', 'blocked', 'promoted', 'abandoned']
+VALID_CATEGORIES = ['feature', 'enhancement', 'bugfix', 'infrastructure', 'documentation', 'refactor', 'research']
+VALID_PRIORITIES = ['low', 'medium', 'high', 'critical']
+VALID_TARGET_SOURCES = ['manual', 'keywords', 'classifier']  # who set target_project
+STUB_ID_PATTERN = re.compile(r'^STUB-\d{3}$')
+FEATURE_NAME_PATTERN = re.compile(r'^[a-z0-9-]+$')
+PROMOTED_TO_PATTERN = re.compile(r'^WO-[A-Z0-9-]+-\d{3}$')
+
+
+def add_batch_arguments(parser) -> None:
+    """Add the shared --jobs/--pool flags to a script's argument parser."""
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=1,
+        help="Workers for stub parsing, validation and migration (0 = one per CPU, default: 1)"
+    )
+    parser.add_argument(
+        "--pool",
+        choices=["process", "thread"],
+        default="process",
+        help="Worker pool type when --jobs > 1 (default: process)"
+    )
+
+
+def map_jobs(func: Callable, items: List, jobs: int = 1, pool: str = "process") -> List:
+    """
+    Apply func to every item, on a worker pool when jobs > 1.
+    Results are returned in input order, so callers merge deterministically.
+    With pool="process", func must be a module-level function.
+    """
+    items = list(items)
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    if jobs <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+
+    workers = min(jobs, len(items))
+    if pool == "thread":
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(func, items))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(func, items, chunksize=max(1, len(items) // (workers * 4))))
+
+
+def parse_stub_file(stub_file: Path) -> Tuple[Optional[Dict], Optional[str]]:
+    """Parse one stub.json, returning (data, None) or (None, error)."""
+    try:
+        with open(stub_file, 'r', encoding='utf-8') as f:
+            return json.load(f), None
+    except Exception as e:
+        return None, str(e)
+
+
+def validate_stub(stub: Dict) -> List[str]:
+    """Check a parsed stub against the stub schema; returns error messages."""
+    errors = []
+
+    for field in REQUIRED_FIELDS:
+        if field not in stub:
+            errors.append(f"Missing required field: {field}")
+
+    stub_id = stub.get('stub_id')
+    if 'stub_id' in stub and not (isinstance(stub_id, str) and STUB_ID_PATTERN.match(stub_id)):
+        errors.append(f"Invalid stub_id: {stub_id!r} (expected STUB-XXX)")
+
+    feature_name = stub.get('feature_name')
+    if 'feature_name' in stub:
+        if not isinstance(feature_name, str) or not FEATURE_NAME_PATTERN.match(feature_name):
+            errors.append(f"Invalid feature_name: {feature_name!r} (expected kebab-case)")
+        elif not 3 <= len(feature_name) <= 100:
+            errors.append(f"Invalid feature_name length: {len(feature_name)} (expected 3-100)")
+
+    description = stub.get('description')
+    if 'description' in stub and not (isinstance(description, str) and 10 <= len(description) <= 500):
+        length = len(description) if isinstance(description, str) else 'n/a'
+        errors.append(f"Invalid description length: {length} (expected 10-500)")
+
+    for field, valid in (('category', VALID_CATEGORIES), ('priority', VALID_PRIORITIES), ('status', VALID_STATUSES),
+                         ('target_source', VALID_TARGET_SOURCES)):
+        if field in stub and stub[field] not in valid:
+            errors.append(f"Invalid {field}: {stub[field]!r}")
+
+    created = stub.get('created')
+    if 'created' in stub:
+        try:
+            if not isinstance(created, str) or len(created) != 10:
+                raise ValueError
+            datetime.strptime(created, '%Y-%m-%d')
+        except ValueError:
+            errors.append(f"Invalid created date: {created!r} (expected YYYY-MM-DD)")
+
+    promoted_to = stub.get('promoted_to')
+    if 'promoted_to' in stub and not (isinstance(promoted_to, str) and PROMOTED_TO_PATTERN.match(promoted_to)):
+        errors.append(f"Invalid promoted_to: {promoted_to!r} (expected WO-XXX-000)")
+
+    extra = sorted(set(stub) - set(REQUIRED_FIELDS) - set(OPTIONAL_FIELDS))
+    if extra:
+        errors.append(f"Additional properties not allowed: {', '.join(extra)}")
+
+    return errors
+
+
+def _fsync_dir(path: Path) -> None:
+    """fsync a directory so renames inside it are durable (no-op on Windows)."""
+    if os.name == 'nt':
+        return
+    fd = os.open(str(path), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_synced(path: Path, data: bytes) -> None:
+    """Write bytes to path and fsync them."""
+    with open(path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class StubBatch:
+    """
+    Write-ahead batch of file edits with a single commit point.
+    Create via StubCatalog.batch(); nothing touches the real files before commit().
+    """
+
+    def __init__(self, catalog: "StubCatalog"):
+        self.catalog = catalog
+        self.journal_path = catalog.journal_path
+        self.staging_path = catalog.staging_path
+        self.writes: Dict[Path, bytes] = {}  # target -> new content
+        self.stub_names: Dict[Path, str] = {}  # target -> catalog name, for stub files
+        self.skipped = 0  # staged edits dropped because the file already matched
+
+    def __len__(self) -> int:
+        return len(self.writes)
+
+    def stage(self, path: Path, content, encoding: str = 'utf-8') -> bool:
+        """Stage new content for path; returns False if the file already has it."""
+        path = Path(path)
+        data = content.encode(encoding) if isinstance(content, str) else content
+        try:
+            if path.read_bytes() == data:
+                self.writes.pop(path, None)
+                self.skipped += 1
+                return False
+        except OSError:
+            pass
+
+        self.writes[path] = data
+        return True
+
+    def save(self, name: str, data: Dict, ensure_ascii: bool = True) -> bool:
+        """Stage a stub's stub.json; the catalog entry is refreshed on commit."""
+        stub_file = self.catalog.path(name)
+        self.stub_names[stub_file] = name
+        return self.stage(stub_file, json.dumps(data, indent=2, ensure_ascii=ensure_ascii))
+
+    def commit(self) -> int:
+        """Apply all staged writes atomically; returns the number of files written."""
+        if not self.writes:
+            return 0
+
+        pairs = [(target.with_name(target.name + STAGED_SUFFIX), target) for target in sorted(self.writes)]
+
+        # 1. Record what is about to be staged (so recover() can drop it), then
+        #    stage every file next to its target and fsync it
+        _write_synced(self.staging_path, json.dumps([str(staged) for staged, _ in pairs]).encode('utf-8'))
+        for staged, target in pairs:
+            _write_synced(staged, self.writes[target])
+
+        # 2. Commit point: the journal lists the swaps still to perform
+        journal = {"version": 1, "writes": [[str(staged), str(target)] for staged, target in pairs]}
+        journal_tmp = self.journal_path.with_name(self.journal_path.name + ".tmp")
+        _write_synced(journal_tmp, json.dumps(journal).encode('utf-8'))
+        os.replace(journal_tmp, self.journal_path)
+        _fsync_dir(self.journal_path.parent)
+
+        # 3. Swap staged files into place, then retire the journal
+        _apply_journal(self.journal_path)
+        os.remove(self.staging_path)
+
+        for _, target in pairs:
+            name = self.stub_names.get(target)
+            if name is not None:
+                st = target.stat()
+                data = json.loads(self.writes[target].decode('utf-8'))
+                self.catalog.records[name] = StubRecord(name, target, st.st_mtime_ns, st.st_size, data)
+                self.catalog.dirty = True
+
+        written = len(pairs)
+        self.writes.clear()
+        self.stub_names.clear()
+        return written
+
+
+def _apply_journal(journal_path: Path) -> None:
+    """Replay a committed batch journal (idempotent) and remove it."""
+    with open(journal_path, 'r', encoding='utf-8') as f:
+        journal = json.load(f)
+
+    dirs = set()
+    for staged, target in journal["writes"]:
+        if os.path.exists(staged):
+            os.replace(staged, target)
+        dirs.add(os.path.dirname(target))
+
+    for directory in sorted(dirs):
+        _fsync_dir(Path(directory))
+
+    os.remove(journal_path)
+
+
+@dataclass
+class StubRecord:
+    name: str
+    path: Path
+    mtime_ns: int
+    size: int
+    data: Dict
+
+
+class StubCatalog:
+    def __init__(self, working_dir: Path = WORKING_DIR, snapshot_path: Optional[Path] = None, read_only: bool = False,
+                 recursive: bool = False):
+        self.working_dir = Path(working_dir)
+        self.read_only = read_only  # never write the snapshot, journal or stubs (dry runs)
+        self.recursive = recursive  # find stub.json at any depth, not just in top-level folders
+        default_snapshot = RECURSIVE_SNAPSHOT_NAME if recursive else SNAPSHOT_NAME
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else self.working_dir.parent / default_snapshot
+        self.journal_path = self.working_dir.parent / JOURNAL_NAME
+        self.staging_path = self.working_dir.parent / STAGING_NAME
+        self.records: Dict[str, StubRecord] = {}
+        self.errors: List[Tuple[Path, str]] = []
+        self.parsed = 0  # stub.json files actually re-parsed by the last load()
+        self.dirty = False
+
+    def _read_snapshot(self) -> Dict[str, Dict]:
+        """Read cached {path: {mtime_ns, size, data}} entries, or {} if unusable."""
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            return {}
+        return snapshot.get("stubs", {})
+
+    def _write_snapshot(self) -> None:
+        """Persist parsed stubs atomically (best effort - the cache is optional)."""
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "stubs": {
+                str(record.path): {"mtime_ns": record.mtime_ns, "size": record.size, "data": record.data}
+                for record in self.records.values()
+            }
+        }
+        tmp_path = self.snapshot_path.with_name(self.snapshot_path.name + ".tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            print(f"Warning: Failed to write stub catalog snapshot {self.snapshot_path}: {e}")
+
+    def load(self, jobs: int = 1, pool: str = "process") -> int:
+        """Load all stub.json files, re-parsing only those changed since the snapshot."""
+        self.records = {}
+        self.errors = []
+        self.parsed = 0
+
+        if not self.working_dir.exists():
+            return 0
+
+        self.recover()
+        snapshot = self._read_snapshot()
+        found = []  # (name, stub_file, stat) in sorted order
+        stale = []  # stub files that must be re-parsed
+
+        if self.recursive:
+            stub_files = sorted(self.working_dir.glob("**/stub.json"))
+        else:
+            stub_files = [stub_dir / "stub.json" for stub_dir in sorted(self.working_dir.iterdir()) if stub_dir.is_dir()]
+
+        for stub_file in stub_files:
+            try:
+                st = stub_file.stat()
+            except OSError:
+                continue
+
+            found.append((stub_file.parent.relative_to(self.working_dir).as_posix(), stub_file, st))
+            cached = snapshot.get(str(stub_file))
+            if not (cached and cached["mtime_ns"] == st.st_mtime_ns and cached["size"] == st.st_size):
+                stale.append(stub_file)
+
+        parsed = dict(zip(stale, map_jobs(parse_stub_file, stale, jobs, pool)))
+        self.parsed = len(stale)
+
+        for name, stub_file, st in found:
+            if stub_file in parsed:
+                data, error = parsed[stub_file]
+                if error is not None:
+                    self.errors.append((stub_file, error))
+                    continue
+            else:
+                data = snapshot[str(stub_file)]["data"]
+
+            self.records[name] = StubRecord(name, stub_file, st.st_mtime_ns, st.st_size, data)
+
+        self.dirty = bool(self.parsed) or len(snapshot) != len(self.records)
+        self.flush()
+
+        return len(self.records)
+
+    def recover(self) -> None:
+        """Finish a batch that crashed after its commit point, or drop one that crashed before."""
+        if self.read_only:
+            if self.journal_path.exists():
+                print(f"Warning: Interrupted stub batch not recovered (read-only): {self.journal_path}")
+            return
+
+        if self.journal_path.exists():
+            print(f"Recovering interrupted stub batch: {self.journal_path}")
+            _apply_journal(self.journal_path)
+
+        # Anything still staged belongs to a batch that never reached its commit point
+        staged_files = list(self.working_dir.glob(("**/" if self.recursive else "*/") + "stub.json" + STAGED_SUFFIX))
+        if self.staging_path.exists():
+            try:
+                with open(self.staging_path, 'r', encoding='utf-8') as f:
+                    staged_files.extend(Path(staged) for staged in json.load(f))
+            except (OSError, ValueError):
+                pass
+            self.staging_path.unlink()
+
+        for staged in staged_files:
+            if staged.exists():
+                staged.unlink()
+
+    def batch(self) -> StubBatch:
+        """Start a transactional batch of stub (and related file) writes."""
+        if self.read_only:
+            raise RuntimeError("StubCatalog opened read-only")
+        return StubBatch(self)
+
+    def validate_all(self, jobs: int = 1, pool: str = "process") -> Dict[str, List[str]]:
+        """Validate every loaded stub; returns {folder name: errors} in sorted order."""
+        names = self.names()
+        results = map_jobs(validate_stub, [self.records[name].data for name in names], jobs, pool)
+        return dict(zip(names, results))
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.records
+
+    def names(self) -> List[str]:
+        """Stub folder names in sorted order."""
+        return sorted(self.records)
+
+    def items(self) -> Iterator[Tuple[str, Dict]]:
+        """Yield (folder name, stub data) in sorted order."""
+        for name in self.names():
+            yield name, self.records[name].data
+
+    def get(self, name: str) -> Optional[Dict]:
+        """Return parsed stub data by folder name, or None."""
+        record = self.records.get(name)
+        return record.data if record else None
+
+    def path(self, name: str) -> Path:
+        """Return the stub.json path for a folder name."""
+        record = self.records.get(name)
+        return record.path if record else self.working_dir / name / "stub.json"
+
+    def as_dict(self) -> Dict[str, Dict]:
+        """Return {folder name: stub data} for all loaded stubs."""
+        return {name: data for name, data in self.items()}
+
+    def save(self, name: str, data: Dict, ensure_ascii: bool = True) -> None:
+        """Write a single stub back to disk atomically (a one-file batch)."""
+        batch = self.batch()
+        batch.save(name, data, ensure_ascii=ensure_ascii)
+        batch.commit()
+
+    def flush(self) -> None:
+        """Write the snapshot if stubs were parsed or saved since the last write."""
+        if self.dirty and not self.read_only:
+            self._write_snapshot()
+            self.dirty = False
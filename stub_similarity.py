@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Stub Similarity - Near-duplicate detection for stubs with MinHash + LSH.
+
+Each stub is reduced to a token set (feature_name, description and tags),
+summarised as a MinHash signature and bucketed with locality-sensitive hashing.
+Only stubs that share a bucket are compared, so finding candidate pairs is
+sub-quadratic; candidates are then confirmed with exact Jaccard similarity and
+joined into clusters.
+
+Usage:
+    from stub_similarity import find_duplicate_clusters
+
+    clusters = find_duplicate_clusters({"name": stub_data, ...}, threshold=0.5)
+    for cluster in clusters:
+        print(cluster.members, cluster.score)
+"""
+
+import hashlib
+import random
+import re
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+NUM_PERM = 64
+MIN_RECALL = 0.95  # chance that a pair exactly at the threshold shares some band
+DEFAULT_THRESHOLD = 0.5
+SEED = 1
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+STOPWORDS = frozenset([
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'into', 'is', 'it',
+    'of', 'on', 'or', 'so', 'that', 'the', 'their', 'this', 'to', 'with', 'without', 'we',
+])
+
+
+def stub_tokens(name: str, data: Dict) -> FrozenSet[str]:
+    """Token set for a stub: feature_name parts, description words and tags."""
+    text = [data.get("feature_name") or name, data.get("description") or ""]
+    tags = data.get("tags") or []
+    if isinstance(tags, list):
+        text.extend(str(tag) for tag in tags)
+
+    return frozenset(
+        token for token in TOKEN_PATTERN.findall(" ".join(str(part) for part in text).lower())
+        if len(token) > 1 and token not in STOPWORDS
+    )
+
+
+def jaccard(left: FrozenSet[str], right: FrozenSet[str]) -> float:
+    """Exact Jaccard similarity of two token sets."""
+    if not left and not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+class MinHasher:
+    """Fixed family of NUM_PERM universal hash permutations (deterministic via SEED)."""
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = SEED):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.permutations = [
+            (rng.randint(1, MERSENNE_PRIME - 1), rng.randint(0, MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, tokens: Iterable[str]) -> Tuple[int, ...]:
+        """MinHash signature of a token set."""
+        hashes = [
+            int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=4).digest(), 'little')
+            for token in tokens
+        ]
+        if not hashes:
+            return (MAX_HASH,) * self.num_perm
+
+        return tuple(
+            min(((a * h + b) % MERSENNE_PRIME) & MAX_HASH for h in hashes)
+            for a, b in self.permutations
+        )
+
+
+def collision_probability(similarity: float, bands: int, rows: int) -> float:
+    """Chance that two sets with this Jaccard similarity share at least one band."""
+    return 1 - (1 - similarity ** rows) ** bands
+
+
+def choose_bands(threshold: float, num_perm: int = NUM_PERM, min_recall: float = MIN_RECALL) -> int:
+    """
+    Number of bands for a similarity threshold: the most rows per band (fewest
+    false candidates) that still gives min_recall at the threshold, e.g. 32 x 2
+    for 0.5 with 64 permutations. Falls back to one row per band.
+    """
+    for rows in range(num_perm, 0, -1):
+        if num_perm % rows == 0 and collision_probability(threshold, num_perm // rows, rows) >= min_recall:
+            return num_perm // rows
+    return num_perm
+
+
+class LSHIndex:
+    """Banded LSH over MinHash signatures; candidate pairs share at least one band."""
+
+    def __init__(self, bands: int, num_perm: int = NUM_PERM):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.buckets: Dict[Tuple[int, Tuple[int, ...]], List[str]] = {}
+
+    def add(self, key: str, signature: Tuple[int, ...]) -> None:
+        for band in range(self.bands):
+            start = band * self.rows
+            self.buckets.setdefault((band, signature[start:start + self.rows]), []).append(key)
+
+    def candidate_pairs(self) -> Set[Tuple[str, str]]:
+        """Unordered key pairs that collide in some band."""
+        pairs = set()
+        for keys in self.buckets.values():
+            if len(keys) < 2:
+                continue
+            keys = sorted(set(keys))
+            for i, left in enumerate(keys):
+                for right in keys[i + 1:]:
+                    pairs.add((left, right))
+        return pairs
+
+
+@dataclass
+class DuplicateCluster:
+    members: List[str]
+    pairs: List[Tuple[str, str, float]] = field(default_factory=list)  # confirmed (a, b, jaccard)
+
+    @property
+    def score(self) -> float:
+        """Mean similarity of the confirmed pairs holding the cluster together."""
+        return sum(sim for _, _, sim in self.pairs) / len(self.pairs) if self.pairs else 0.0
+
+    def similarity(self, name: str) -> float:
+        """Best similarity between a member and any other member."""
+        return max((sim for a, b, sim in self.pairs if name in (a, b)), default=0.0)
+
+
+def find_duplicate_clusters(stubs: Dict[str, Dict], threshold: float = DEFAULT_THRESHOLD,
+                            num_perm: int = NUM_PERM, bands: Optional[int] = None) -> List[DuplicateCluster]:
+    """
+    Cluster near-duplicate stubs ({key: stub data}).
+    Bands default to choose_bands(threshold), so pairs at the threshold are found
+    with at least MIN_RECALL probability.
+    Returns clusters of 2+ members, sorted by descending score then members.
+    """
+    hasher = MinHasher(num_perm)
+    index = LSHIndex(bands or choose_bands(threshold, num_perm), num_perm)
+    tokens = {}
+
+    for key in sorted(stubs):
+        tokens[key] = stub_tokens(key, stubs[key])
+        if tokens[key]:
+            index.add(key, hasher.signature(tokens[key]))
+
+    # Confirm LSH candidates with exact Jaccard, then union-find into clusters
+    parent = {key: key for key in tokens}
+
+    def find(key: str) -> str:
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    confirmed = []
+    for left, right in sorted(index.candidate_pairs()):
+        sim = jaccard(tokens[left], tokens[right])
+        if sim >= threshold:
+            confirmed.append((left, right, round(sim, 3)))
+            root_left, root_right = find(left), find(right)
+            if root_left != root_right:
+                parent[max(root_left, root_right)] = min(root_left, root_right)
+
+    groups: Dict[str, DuplicateCluster] = {}
+    for left, right, sim in confirmed:
+        cluster = groups.setdefault(find(left), DuplicateCluster(members=[]))
+        cluster.pairs.append((left, right, sim))
+    for cluster in groups.values():
+        cluster.members = sorted({key for pair in cluster.pairs for key in pair[:2]})
+
+    return sorted(groups.values(), key=lambda c: (-c.score, c.members))
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Target Classifier - TF-IDF nearest-centroid model for stub target_project.
+
+Trained on stubs (working + archived) whose real target_project was chosen by
+a person: targets that infer-target-projects.py or assign-unknown-targets.py set
+automatically are tagged with target_source and never used as labels, so the
+model does not learn from its own predictions. Archived stubs are only read.
+The fitted model is cached in coderef/.target-model.json together with a
+fingerprint of the labeled set, so it is only retrained when labels or stub
+text change. Predictions carry a confidence (the winning centroid's relative
+margin over the runner-up); callers treat low-confidence stubs as unknown.
+
+Usage:
+    from target_classifier import TargetClassifier
+
+    classifier = load_classifier(catalog)  # catalog: loaded StubCatalog of coderef/working
+    project, confidence = classifier.predict(stub)
+"""
+
+import hashlib
+import json
+import math
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from stub_catalog import StubCatalog
+from stub_similarity import STOPWORDS, TOKEN_PATTERN
+
+MODEL_PATH = Path(__file__).parent / "coderef" / ".target-model.json"
+ARCHIVED_SNAPSHOT_NAME = ".stub-catalog-archived.json"  # shared with archive-stubs.py
+MODEL_VERSION = 1
+DEFAULT_MIN_CONFIDENCE = 0.3
+UNLABELED = ("", "unknown")  # target_project values that are not training labels
+AUTO_TARGET_SOURCES = ("keywords", "classifier")  # target_source of machine-assigned targets
+
+Vector = Dict[str, float]
+
+
+def stub_text(stub: Dict) -> str:
+    """Text a stub is classified on: feature_name, description and tags."""
+    parts = [str(stub.get("feature_name") or ""), str(stub.get("description") or "")]
+    tags = stub.get("tags") or []
+    if isinstance(tags, list):
+        parts.extend(str(tag) for tag in tags)
+    return " ".join(parts)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def _normalize(vector: Vector) -> Vector:
+    norm = math.sqrt(sum(w * w for w in vector.values()))
+    return {term: w / norm for term, w in vector.items()} if norm else {}
+
+
+def labeled_examples(stubs: Dict[str, Dict]) -> Dict[str, Tuple[str, str]]:
+    """{name: (text, target_project)} for stubs with a human-assigned target."""
+    return {
+        name: (stub_text(stub), stub["target_project"])
+        for name, stub in sorted(stubs.items())
+        if isinstance(stub.get("target_project"), str) and stub["target_project"] not in UNLABELED
+        and stub.get("target_source") not in AUTO_TARGET_SOURCES
+    }
+
+
+def fingerprint(examples: Dict[str, Tuple[str, str]]) -> str:
+    """Hash of the labeled set; the cached model is reused while it matches."""
+    digest = hashlib.sha1(str(MODEL_VERSION).encode('utf-8'))
+    for name in sorted(examples):
+        text, label = examples[name]
+        digest.update(f"{name}\0{label}\0{text}\0".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class TargetClassifier:
+    def __init__(self, idf: Dict[str, float], centroids: Dict[str, Vector], fingerprint: str = ""):
+        self.idf = idf
+        self.centroids = centroids
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def train(cls, examples: Dict[str, Tuple[str, str]]) -> "TargetClassifier":
+        """Fit smoothed TF-IDF weights and one L2-normalized centroid per label."""
+        docs = [(Counter(tokenize(text)), label) for text, label in examples.values()]
+        doc_freq = Counter(term for counts, _ in docs for term in counts)
+        n = len(docs)
+        idf = {term: math.log((1 + n) / (1 + df)) + 1 for term, df in doc_freq.items()}
+
+        sums: Dict[str, Vector] = {}
+        for counts, label in docs:
+            vector = _normalize({term: (1 + math.log(tf)) * idf[term] for term, tf in counts.items()})
+            centroid = sums.setdefault(label, {})
+            for term, weight in vector.items():
+                centroid[term] = centroid.get(term, 0.0) + weight
+
+        centroids = {label: _normalize(vector) for label, vector in sorted(sums.items())}
+        return cls(idf, centroids, fingerprint(examples))
+
+    def vectorize(self, text: str) -> Vector:
+        counts = Counter(t for t in tokenize(text) if t in self.idf)
+        return _normalize({term: (1 + math.log(tf)) * self.idf[term] for term, tf in counts.items()})
+
+    def scores(self, stub: Dict) -> Dict[str, float]:
+        """Cosine similarity of a stub to every label centroid."""
+        vector = self.vectorize(stub_text(stub))
+        return {
+            label: sum(weight * centroid.get(term, 0.0) for term, weight in vector.items())
+            for label, centroid in self.centroids.items()
+        }
+
+    def predict(self, stub: Dict) -> Tuple[Optional[str], float]:
+        """(best label, confidence in [0, 1]); (None, 0.0) if nothing overlaps."""
+        scores = self.scores(stub)
+        ranked = sorted(scores.items(), key=lambda x: (-x[1], x[0]))
+        if not ranked or ranked[0][1] <= 0:
+            return None, 0.0
+
+        label, best = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        return label, (best - runner_up) / best
+
+    def save(self, path: Path = MODEL_PATH) -> None:
+        """Persist the model atomically (best effort - it can always be retrained)."""
+        model = {"version": MODEL_VERSION, "fingerprint": self.fingerprint, "idf": self.idf, "centroids": self.centroids}
+        tmp_path = path.with_name(path.name + ".tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(model, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: Failed to write target model {path}: {e}")
+
+    @classmethod
+    def load(cls, path: Path = MODEL_PATH) -> Optional["TargetClassifier"]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                model = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if model.get("version") != MODEL_VERSION:
+            return None
+        return cls(model["idf"], model["centroids"], model["fingerprint"])
+
+    @classmethod
+    def load_or_train(cls, stubs: Dict[str, Dict], path: Path = MODEL_PATH) -> "TargetClassifier":
+        """Reuse the cached model if the labeled set is unchanged, else retrain and save."""
+        examples = labeled_examples(stubs)
+        model = cls.load(path)
+        if model is not None and model.fingerprint == fingerprint(examples):
+            return model
+
+        model = cls.train(examples)
+        model.save(path)
+        return model
+
+
+def load_classifier(catalog: StubCatalog, jobs: int = 1, pool: str = "process") -> TargetClassifier:
+    """Cached classifier trained on a loaded working catalog plus its sibling archived/ stubs."""
+    coderef_dir = catalog.working_dir.parent
+    archived = StubCatalog(coderef_dir / "archived", snapshot_path=coderef_dir / ARCHIVED_SNAPSHOT_NAME, read_only=True)
+    archived.load(jobs=jobs, pool=pool)
+
+    stubs = catalog.as_dict()
+    stubs.update({"archived/" + name: stub for name, stub in archived.items()})
+    return TargetClassifier.load_or_train(stubs, coderef_dir / MODEL_PATH.name)
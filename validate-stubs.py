@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Validate Stubs - Check every coderef/working/*/stub.json against the stub schema.
+
+Rules follow coderef/foundation-docs/SCHEMA.md (see stub_catalog.validate_stub).
+Parsing and validation run on a worker pool with --jobs; the report is merged
+in sorted stub order, so output is identical to a serial run.
+
+Exit status: 0 = all stubs valid, 1 = errors found.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from stub_catalog import WORKING_DIR, StubCatalog, add_batch_arguments
+
+
+def main() -> int:
+    """Main execution."""
+    parser = argparse.ArgumentParser(description="Validate all stub.json files against the stub schema")
+    parser.add_argument(
+        "--working-dir",
+        type=Path,
+        default=WORKING_DIR,
+        help=f"Stub working directory (default: {WORKING_DIR})"
+    )
+    parser.add_argument(
+        "--quiet", "-q",
+        action="store_true",
+        help="Only print stubs with errors"
+    )
+    add_batch_arguments(parser)
+    args = parser.parse_args()
+
+    catalog = StubCatalog(args.working_dir)
+    catalog.load(jobs=args.jobs, pool=args.pool)
+    results = catalog.validate_all(jobs=args.jobs, pool=args.pool)
+
+    print("Validating stubs...")
+
+    lines = []
+    for stub_file, error in catalog.errors:
+        lines.append((stub_file.parent.name, f"✗ {stub_file.parent.name} (Invalid JSON: {error})"))
+
+    error_count = len(catalog.errors)
+    for name, errors in results.items():
+        stub_id = catalog.get(name).get("stub_id") or "STUB-???"
+        if errors:
+            error_count += len(errors)
+            lines.append((name, f"✗ {stub_id}: {name} ({'; '.join(errors)})"))
+        elif not args.quiet:
+            lines.append((name, f"✓ {stub_id}: {name}"))
+
+    for _, line in sorted(lines):
+        print(line)
+
+    print("---")
+    print(f"{len(results) + len(catalog.errors)} stubs validated, {error_count} error(s) found")
+
+    return 1 if error_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
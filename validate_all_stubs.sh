@@ -1,27 +1,6 @@
 #!/bin/bash
+# Validate every coderef/working/*/stub.json against the stub schema.
+# Arguments are passed through, e.g.: ./validate_all_stubs.sh --jobs 8
 
-# Array of all stub files
-stubs=(
-"C:\Users\willh\Desktop\assistant\coderef\working\agent-completion-workflow\stub.json"
-"C:\Users\willh\Desktop\assistant\coderef\working\agent-dashboard-filesystem-workflow\stub.json"
-"C:\Users\willh\Desktop\assistant\coderef\working\agent-git-branches\stub.json"
-"C:\Users\willh\Desktop\assistant\coderef\working\agent-persona-team-page\stub.json"
-"C:\Users\willh\Desktop\assistant\coderef\working\agent-perspective-session-reports\stub.json"
-"C:\Users\willh\Desktop\assistant\coderef\working\agent-reporting-prompts\stub.json"
-"C:\Users\willh\Desktop\assistant\coderef\working\ai-context-improvements\stub.json"
-"C:\Users\willh\Desktop\assistant\coderef\working\ai-video-gen\stub.json"
-"C:\Users\willh\Desktop\assistant\coderef\working\align-plan-command-refactor\stub.json"
-"C:\Users\willh\Desktop\assistant\coderef\working\assistant-to-other-projects\stub.json"
-"C:\Users\willh\Desktop\assistant\coderef\working\auto-cache-invalidation\stub.json"
-"C:\Users\willh\Desktop\assistant\coderef\working\code-review-projects\stub.json"
-"C:\Users\willh\Desktop\assistant\coderef\working\coderef-agent-documentation-standards\stub.json"
-"C:\Users\willh\Desktop\assistant\coderef\working\coderef-assistant-mcp\stub.json"
-"C:\Users\willh\Desktop\assistant\coderef\working\coderef-context-cli-health-check\stub.json"
-"C:\Users\willh\Desktop\assistant\coderef\working\coderef-directory-rename\stub.json"
-"C:\Users\willh\Desktop\assistant\coderef\working\coderef-directory-reports\stub.json"
-"C:\Users\willh\Desktop\assistant\coderef\working\coderef-ecosystem-docs-uds-compliance\stub.json"
-"C:\Users\willh\Desktop\assistant\coderef\working\coderef-ecosystem-naming-standardization\stub.json"
-"C:\Users\willh\Desktop\assistant\coderef\working\coderef-personas-removal\stub.json"
-)
-
-echo "Found ${#stubs[@]} stub files to validate"
+cd "$(dirname "$0")" || exit 1
+exec python validate-stubs.py "$@"
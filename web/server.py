@@ -2,18 +2,824 @@
 """
 Simple HTTP server with file browsing API for CodeRef Explorer
 """
+import argparse
+import bisect
+import functools
+import gzip
+import hashlib
 import http.server
-import socketserver
 import json
 import os
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import parse_qs, urlparse
 from pathlib import Path
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Columnar .coderef loader shared with the discovery scripts (workspace root)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from coderef_columns import Table, load_columns  # noqa: E402
+
 PORT = 8080
+WORKERS = 8
+TREE_CACHE_SIZE = 4096
+COMPRESS_MIN_SIZE = 1024  # bytes; smaller JSON bodies are sent uncompressed
+RAW_CHUNK_SIZE = 64 * 1024  # bytes read per chunk when compressing a raw file
+COMPRESSIBLE_TYPES = {'application/json', 'application/javascript', 'application/xml'}  # besides text/*
 PROJECTS_FILE = 'projects.json'
+SEARCH_INDEX_DIR = '.search-index'
+SEARCH_REFRESH_INTERVAL = 5.0  # seconds between re-stats of a project tree
+SEARCH_MAX_FILE_SIZE = 1024 * 1024  # larger files are not indexed
+SEARCH_INDEX_SHARDS = 64  # index files per project; a refresh rewrites only the shards it changed
+SKIP_DIRS = {'.git', 'node_modules', '.venv', 'venv', '__pycache__', 'dist', SEARCH_INDEX_DIR}
+WORKSPACE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WATCH_INTERVAL = 2.0  # seconds between change-feed scans
+EVENT_BUFFER_SIZE = 1000  # events kept for Last-Event-ID resume
+EVENT_HEARTBEAT = 15.0  # seconds between SSE keep-alive comments
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+API_ROUTES = {'/api/projects', '/api/tree', '/api/file', '/api/search', '/api/coderef', '/api/events', '/api/stats', '/api/metrics'}
+CODEREF_FILES = {'index': ('.coderef', 'index.json'), 'graph': ('.coderef', 'exports', 'graph.json')}
+CODEREF_DEFAULT_TABLES = {'index': 'elements', 'graph': 'nodes'}  # when ?table= is omitted
+CODEREF_PARAMS = {'project', 'doc', 'table', 'offset', 'limit'}  # everything else is a column filter
+SLOW_REQUEST_MS = None  # log requests slower than this; None disables
+
+
+def write_json_atomic(path, data, indent=None):
+    """Write JSON to a temp file, fsync it and swap it into place"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '-', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class TreeCache:
+    """LRU cache of directory listings, invalidated by directory mtime
+
+    Each directory is cached separately, so a change deep in a tree only
+    re-lists the folder whose mtime moved; unchanged siblings and parents
+    are served from memory.
+    """
+
+    def __init__(self, max_entries=TREE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # {path: (mtime_ns, [(name, is_dir, is_symlink)])}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def list_dir(self, path):
+        """Return sorted (name, is_dir, is_symlink) tuples for a directory"""
+        mtime = os.stat(path).st_mtime_ns
+
+        with self.lock:
+            cached = self.entries.get(path)
+            if cached is not None and cached[0] == mtime:
+                self.entries.move_to_end(path)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        # scandir exposes the entry type from the directory read itself,
+        # so no per-entry stat is needed to tell folders from files
+        with os.scandir(path) as it:
+            listing = sorted((entry.name, entry.is_dir(), entry.is_symlink()) for entry in it)
+
+        with self.lock:
+            self.entries[path] = (mtime, listing)
+            self.entries.move_to_end(path)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+        return listing
+
+    def stats(self):
+        """Return cache counters for operators"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+TREE_CACHE = TreeCache()
+
+
+class ProjectStore:
+    """Project registry held in memory and keyed by id
+
+    projects.json is read once (and again only if it is edited on disk),
+    mutations are serialized by a lock, and every write goes to a temp file
+    that atomically replaces the registry so a crash never leaves it torn.
+    """
+
+    def __init__(self, path=PROJECTS_FILE):
+        self.path = path
+        self.projects = {}  # {id: project}, insertion-ordered like the file
+        self.mtime = None
+        self.lock = threading.Lock()
+
+    def _refresh(self):
+        """Load the registry if it is new or was changed outside the server"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+
+        if mtime == self.mtime:
+            return
+
+        projects = {}
+        if mtime is not None:
+            with open(self.path, 'r') as f:
+                for project in json.load(f):
+                    projects[project['id']] = project
+        self.projects = projects
+        self.mtime = mtime
+
+    def _persist(self):
+        """Write the registry to a temp file and swap it into place"""
+        write_json_atomic(self.path, list(self.projects.values()), indent=2)
+        self.mtime = os.stat(self.path).st_mtime_ns
+
+    def exists(self):
+        """Return True if a registry file has been created"""
+        with self.lock:
+            self._refresh()
+            return self.mtime is not None
+
+    def all(self):
+        """Return all projects in registry order"""
+        with self.lock:
+            self._refresh()
+            return list(self.projects.values())
+
+    def save(self, project):
+        """Insert or update a project by id"""
+        with self.lock:
+            self._refresh()
+            previous = self.projects.get(project['id'])
+            self.projects[project['id']] = project
+            try:
+                self._persist()
+            except BaseException:
+                if previous is None:
+                    del self.projects[project['id']]
+                else:
+                    self.projects[project['id']] = previous
+                raise
+
+    def delete(self, project_id):
+        """Remove a project by id; returns False if it was not registered"""
+        with self.lock:
+            self._refresh()
+            previous = self.projects.pop(project_id, None)
+            if previous is None:
+                return False
+            try:
+                self._persist()
+            except BaseException:
+                self.projects[project_id] = previous
+                raise
+            return True
+
+
+PROJECT_STORE = ProjectStore()
+
+
+def walk_files(root, use_cache=True):
+    """Yield (path, stat) for files under root, skipping SKIP_DIRS
+
+    Directory listings come from TREE_CACHE, so repeated walks of an
+    unchanged tree only cost one stat per file. use_cache=False reads them
+    with scandir instead, for background walks that must not evict /api/tree
+    listings or count towards the cache statistics.
+    """
+    pending = [root]
+    while pending:
+        folder = pending.pop()
+        try:
+            if use_cache:
+                entries = TREE_CACHE.list_dir(folder)
+            else:
+                with os.scandir(folder) as it:
+                    entries = [(entry.name, entry.is_dir(), entry.is_symlink()) for entry in it]
+        except OSError:
+            continue
+
+        for name, is_dir, is_symlink in entries:
+            full_path = os.path.join(folder, name)
+            if is_dir:
+                if name not in SKIP_DIRS and not is_symlink:
+                    pending.append(full_path)
+                continue
+            try:
+                yield full_path, os.stat(full_path)
+            except OSError:
+                continue
+
+
+def trigrams(text):
+    """Return the set of lowercase 3-character substrings of text"""
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """Persistent trigram index over the files under one project root
+
+    Each indexed file keeps its (mtime, size) and trigram set; postings map
+    trigram -> file paths, and name_postings do the same for file names so
+    files that match only by name are still candidates. refresh() re-stats the tree and re-reads only new
+    or changed files, and the index is saved to SEARCH_INDEX_DIR so a
+    restart does not re-read the whole project. The saved index is split
+    into SEARCH_INDEX_SHARDS files by path hash, and only shards holding a
+    changed file are rewritten.
+    """
+
+    def __init__(self, root, index_dir):
+        self.root = root
+        self.index_dir = index_dir
+        self.files = {}     # {path: {'mtime': int, 'size': int, 'trigrams': set}}
+        self.postings = {}  # {trigram: set(path)}
+        self.name_postings = {}  # {trigram of the file name: set(path)}
+        self.dirty = set()  # shards changed since the last save
+        self.refreshed_at = 0.0
+        self.lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def _shard(path):
+        return zlib.crc32(path.encode('utf-8', 'surrogatepass')) % SEARCH_INDEX_SHARDS
+
+    def _shard_path(self, shard):
+        return os.path.join(self.index_dir, f'shard-{shard:03d}.json')
+
+    def _load(self):
+        for shard in range(SEARCH_INDEX_SHARDS):
+            try:
+                with open(self._shard_path(shard), 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+
+            if data.get('root') != self.root or data.get('shards') != SEARCH_INDEX_SHARDS:
+                continue
+            for path, entry in data.get('files', {}).items():
+                self._add(path, entry['mtime'], entry['size'], set(entry['trigrams']))
+        self.dirty.clear()
+
+    def _save(self):
+        """Rewrite the shards that changed since the last save"""
+        os.makedirs(self.index_dir, exist_ok=True)
+        shards = {shard: {} for shard in self.dirty}
+        for path, entry in self.files.items():
+            files = shards.get(self._shard(path))
+            if files is not None:
+                files[path] = {'mtime': entry['mtime'], 'size': entry['size'], 'trigrams': sorted(entry['trigrams'])}
+
+        for shard, files in shards.items():
+            write_json_atomic(self._shard_path(shard), {
+                'root': self.root,
+                'shards': SEARCH_INDEX_SHARDS,
+                'files': files
+            })
+        self.dirty.clear()
+
+    def _add(self, path, mtime, size, grams):
+        self.files[path] = {'mtime': mtime, 'size': size, 'trigrams': grams}
+        self.dirty.add(self._shard(path))
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(path)
+        for gram in trigrams(os.path.basename(path)):
+            self.name_postings.setdefault(gram, set()).add(path)
+
+    def _remove(self, path):
+        entry = self.files.pop(path)
+        self.dirty.add(self._shard(path))
+        for postings, grams in ((self.postings, entry['trigrams']),
+                                (self.name_postings, trigrams(os.path.basename(path)))):
+            for gram in grams:
+                paths = postings.get(gram)
+                if paths is not None:
+                    paths.discard(path)
+                    if not paths:
+                        del postings[gram]
+
+    def _read_text(self, path):
+        """Read a file as text, or return None for binary/unreadable files"""
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        if b'\0' in data[:8192]:
+            return None
+        return data.decode('utf-8', errors='ignore')
+
+    def refresh(self, force=False):
+        """Re-index new/changed files and drop deleted ones"""
+        with self.lock:
+            if not force and time.monotonic() - self.refreshed_at < SEARCH_REFRESH_INTERVAL:
+                return
+
+            seen = set()
+            # Like the change feed, index walks bypass TREE_CACHE so they do not
+            # evict /api/tree listings or show up in the /api/stats counters
+            for path, st in walk_files(self.root, use_cache=False):
+                if st.st_size > SEARCH_MAX_FILE_SIZE:
+                    continue
+                seen.add(path)
+                entry = self.files.get(path)
+                if entry is not None and entry['mtime'] == st.st_mtime_ns and entry['size'] == st.st_size:
+                    continue
+
+                if entry is not None:
+                    self._remove(path)
+                text = self._read_text(path)
+                self._add(path, st.st_mtime_ns, st.st_size, trigrams(text) if text is not None else set())
+
+            for path in [p for p in self.files if p not in seen]:
+                self._remove(path)
+
+            if self.dirty:
+                self._save()
+            self.refreshed_at = time.monotonic()
+
+    @staticmethod
+    def _intersect(postings, grams):
+        """Paths present in the posting list of every gram (smallest lists first)"""
+        lists = sorted((postings.get(gram, set()) for gram in grams), key=len)
+        result = set(lists[0])
+        for paths in lists[1:]:
+            result &= paths
+            if not result:
+                break
+        return result
+
+    def candidates(self, query):
+        """Return paths whose contents or file name contain every trigram of the query"""
+        with self.lock:
+            grams = trigrams(query)
+            if not grams:
+                # Too short for trigrams: every text file is a candidate, plus name matches
+                needle = query.lower()
+                return [
+                    path for path, entry in self.files.items()
+                    if entry['trigrams'] or needle in os.path.basename(path).lower()
+                ]
+
+            return list(self._intersect(self.postings, grams) | self._intersect(self.name_postings, grams))
+
+    def search(self, query, limit, max_snippets=5):
+        """Return (top `limit` ranked hits with line snippets, total matching files)"""
+        self.refresh()
+        needle = query.lower()
+        hits = []
+
+        for path in self.candidates(query):
+            # Binary or unreadable files can still match by name
+            text = self._read_text(path) or ''
+
+            matches = []
+            count = 0
+            for line_number, line in enumerate(text.splitlines(), 1):
+                if needle in line.lower():
+                    count += 1
+                    if len(matches) < max_snippets:
+                        matches.append({'line': line_number, 'text': line.strip()[:200]})
+            name_match = needle in os.path.basename(path).lower()
+            if not count and not name_match:
+                continue
+
+            hits.append({
+                'path': path,
+                'score': count + (10 if name_match else 0),
+                'match_count': count,
+                'matches': matches
+            })
+
+        hits.sort(key=lambda hit: (-hit['score'], hit['path']))
+        return hits[:limit], len(hits)
+
+
+SEARCH_INDEXES = {}  # {(project id, root): SearchIndex}
+SEARCH_INDEXES_LOCK = threading.Lock()
+
+
+def get_search_index(project):
+    """Return the (lazily created) search index for a registered project"""
+    key = (project['id'], project['path'])
+    with SEARCH_INDEXES_LOCK:
+        index = SEARCH_INDEXES.get(key)
+        if index is None:
+            digest = hashlib.sha1('\0'.join(key).encode()).hexdigest()[:16]
+            index = SearchIndex(project['path'], os.path.join(SEARCH_INDEX_DIR, digest))
+            SEARCH_INDEXES[key] = index
+        return index
+
+
+class ColumnStore:
+    """Columnar .coderef documents, reloaded only when the JSON file changes
+
+    load_columns memory-maps the binary sidecar next to each file, so a
+    project's index is parsed from JSON once and later loads are near-free.
+    """
+
+    def __init__(self):
+        self.documents = {}  # {path: ((size, mtime_ns), document)}
+        self.lock = threading.Lock()
+
+    def get(self, path):
+        stat = os.stat(path)
+        key = (stat.st_size, stat.st_mtime_ns)
+
+        with self.lock:
+            cached = self.documents.get(path)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+
+        document = load_columns(Path(path))
+        with self.lock:
+            self.documents[path] = (key, document)
+        return document
+
+
+COLUMN_STORE = ColumnStore()
+
+
+class ChangeFeed:
+    """Shared filesystem watcher behind the /api/events SSE stream
+
+    One background thread polls registered project roots, the workspace's
+    coderef/working/*/stub.json files and workorders.json, and appends
+    add/modify/delete events to a bounded buffer. Event ids are
+    "<epoch>-<seq>" so a client reconnecting with Last-Event-ID gets only
+    the events it missed, or a reset if they have left the buffer (or the
+    server restarted).
+    """
+
+    def __init__(self, buffer_size=EVENT_BUFFER_SIZE):
+        self.epoch = str(int(time.time()))
+        self.events = deque(maxlen=buffer_size)  # [(seq, event)]
+        self.next_seq = 1
+        self.condition = threading.Condition()
+        self.snapshot = None
+        self.thread = None
+        self.closed = False
+
+    def start(self):
+        """Start the watcher thread on first use"""
+        with self.condition:
+            if self.thread is None and not self.closed:
+                self.thread = threading.Thread(target=self._watch, name='coderef-watcher', daemon=True)
+                self.thread.start()
+
+    def close(self):
+        """Stop the watcher and release every waiting stream"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def _scan(self):
+        """Return {path: (kind, project_id, mtime_ns, size)} for watched files"""
+        files = {}
+        for project in PROJECT_STORE.all():
+            if os.path.isdir(project['path']):
+                # The watcher bypasses TREE_CACHE: its periodic full walks would
+                # otherwise evict listings and inflate the hit/miss counters
+                for path, st in walk_files(project['path'], use_cache=False):
+                    files[path] = ('project', project['id'], st.st_mtime_ns, st.st_size)
+
+        # Stub and workorder files are tagged by kind even inside a project root
+        working_dir = os.path.join(WORKSPACE_ROOT, 'coderef', 'working')
+        watched = [('workorders', os.path.join(WORKSPACE_ROOT, 'workorders.json'))]
+        try:
+            with os.scandir(working_dir) as it:
+                watched.extend(('stub', os.path.join(entry.path, 'stub.json')) for entry in it if entry.is_dir())
+        except OSError:
+            pass
+
+        for kind, path in watched:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            project_id = files[path][1] if path in files else None
+            files[path] = (kind, project_id, st.st_mtime_ns, st.st_size)
+
+        return files
+
+    def _watch(self):
+        while True:
+            with self.condition:
+                if self.closed:
+                    return
+            try:
+                current = self._scan()
+            except Exception as e:
+                print(f"Change feed scan failed: {e}")
+                current = self.snapshot
+
+            if self.snapshot is not None and current is not None:
+                self._publish(self._diff(self.snapshot, current))
+            self.snapshot = current
+
+            with self.condition:
+                self.condition.wait(WATCH_INTERVAL)
+
+    def _diff(self, before, after):
+        changes = []
+        for path in sorted(after.keys() | before.keys()):
+            old, new = before.get(path), after.get(path)
+            if old is None:
+                change = 'add'
+            elif new is None:
+                change = 'delete'
+            elif old[2:] != new[2:]:
+                change = 'modify'
+            else:
+                continue
+
+            kind, project_id = (new or old)[:2]
+            changes.append({
+                'type': change,
+                'kind': kind,
+                'project': project_id,
+                'path': path,
+                'modified': new[2] / 1e9 if new else None
+            })
+        return changes
+
+    def _publish(self, changes):
+        if not changes:
+            return
+        with self.condition:
+            for change in changes:
+                self.events.append((self.next_seq, change))
+                self.next_seq += 1
+            self.condition.notify_all()
+
+    def _parse_event_id(self, event_id):
+        """Return the sequence number for an id from this epoch, else None"""
+        epoch, _, seq = (event_id or '').partition('-')
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def wait(self, last_seq, timeout):
+        """Block until events after last_seq exist; returns (events, reset)
+
+        reset is True when events after last_seq were dropped from the
+        buffer and the client must refetch its state.
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.closed or self.next_seq - 1 > last_seq, timeout)
+            oldest = self.events[0][0] if self.events else self.next_seq
+            if last_seq < oldest - 1:
+                return list(self.events), True
+            return [(seq, event) for seq, event in self.events if seq > last_seq], False
+
+    def stream(self, sock, last_event_id):
+        """Write SSE frames to a detached client socket until it disconnects"""
+        last_seq = self._parse_event_id(last_event_id)
+        try:
+            if last_seq is None:
+                # New client (or unknown epoch): resume from now
+                with self.condition:
+                    last_seq = self.next_seq - 1
+                if last_event_id:
+                    self._send(sock, 'reset', last_seq, {})
+
+            while not self.closed:
+                events, reset = self.wait(last_seq, EVENT_HEARTBEAT)
+                if reset:
+                    self._send(sock, 'reset', events[0][0] - 1 if events else last_seq, {})
+                for seq, event in events:
+                    self._send(sock, 'change', seq, event)
+                    last_seq = seq
+                if not events and not reset:
+                    sock.sendall(b': keep-alive\n\n')
+        except OSError:
+            pass
+        finally:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+    def _send(self, sock, event, seq, data):
+        frame = f"id: {self.epoch}-{seq}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+        sock.sendall(frame.encode())
+
+
+CHANGE_FEED = ChangeFeed()
+
+
+class Metrics:
+    """Per-route request counters and latency histograms
+
+    Rendered as Prometheus text at /api/metrics together with the tree
+    cache counters.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS, slow_request_ms=SLOW_REQUEST_MS):
+        self.buckets = buckets
+        self.slow_request_ms = slow_request_ms
+        self.lock = threading.Lock()
+        self.requests = {}   # {(route, method, status): count}
+        self.latency = {}    # {route: {'buckets': [count per bucket + inf], 'sum': float, 'count': int}}
+        self.bytes_out = {}  # {route: bytes}
+        self.errors = {}     # {route: count} for 5xx and unhandled exceptions
+        self.in_flight = {}  # {route: count}
+
+    def start(self, route):
+        with self.lock:
+            self.in_flight[route] = self.in_flight.get(route, 0) + 1
+
+    def finish(self, route, method, status, bytes_out, elapsed):
+        with self.lock:
+            self.in_flight[route] -= 1
+
+            key = (route, method, str(status) if status else 'error')
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.bytes_out[route] = self.bytes_out.get(route, 0) + bytes_out
+            if not status or status >= 500:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+            histogram = self.latency.setdefault(route, {'buckets': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0})
+            histogram['buckets'][bisect.bisect_left(self.buckets, elapsed)] += 1
+            histogram['sum'] += elapsed
+            histogram['count'] += 1
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format"""
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self.lock:
+            family('coderef_http_requests_total', 'counter', 'Requests handled, by route, method and status.')
+            for (route, method, status), count in sorted(self.requests.items()):
+                lines.append(f'coderef_http_requests_total{{route="{route}",method="{method}",status="{status}"}} {count}')
+
+            family('coderef_http_request_errors_total', 'counter', 'Requests that failed with a 5xx or an unhandled exception.')
+            for route, count in sorted(self.errors.items()):
+                lines.append(f'coderef_http_request_errors_total{{route="{route}"}} {count}')
+
+            family('coderef_http_response_bytes_total', 'counter', 'Bytes written to clients, including headers.')
+            for route, count in sorted(self.bytes_out.items()):
+                lines.append(f'coderef_http_response_bytes_total{{route="{route}"}} {count}')
+
+            family('coderef_http_requests_in_flight', 'gauge', 'Requests currently being handled.')
+            for route, count in sorted(self.in_flight.items()):
+                lines.append(f'coderef_http_requests_in_flight{{route="{route}"}} {count}')
+
+            family('coderef_http_request_duration_seconds', 'histogram', 'Request latency by route.')
+            for route, histogram in sorted(self.latency.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), histogram['buckets']):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'coderef_http_request_duration_seconds_bucket{{route="{route}",le="{le}"}} {cumulative}')
+                lines.append(f'coderef_http_request_duration_seconds_sum{{route="{route}"}} {histogram["sum"]:.6f}')
+                lines.append(f'coderef_http_request_duration_seconds_count{{route="{route}"}} {histogram["count"]}')
+
+        cache = TREE_CACHE.stats()
+        family('coderef_tree_cache_hits_total', 'counter', 'Directory listings served from the tree cache.')
+        lines.append(f"coderef_tree_cache_hits_total {cache['hits']}")
+        family('coderef_tree_cache_misses_total', 'counter', 'Directory listings read from disk.')
+        lines.append(f"coderef_tree_cache_misses_total {cache['misses']}")
+        family('coderef_tree_cache_evictions_total', 'counter', 'Directory listings dropped by the LRU bound.')
+        lines.append(f"coderef_tree_cache_evictions_total {cache['evictions']}")
+        family('coderef_tree_cache_entries', 'gauge', 'Directory listings currently cached.')
+        lines.append(f"coderef_tree_cache_entries {cache['entries']}")
+
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+def route_label(path):
+    """Map a request path to a bounded-cardinality route label"""
+    if path.startswith('/api/projects/'):
+        return '/api/projects/{id}'
+    if path in API_ROUTES:
+        return path
+    if path.startswith('/api/'):
+        return '/api/other'
+    return 'static'
+
+
+def instrumented(method):
+    """Record latency, status, bytes out and in-flight count for a do_* method"""
+    @functools.wraps(method)
+    def wrapper(self):
+        route = route_label(urlparse(self.path).path)
+        bytes_before = self.wfile.count
+        self.status_code = None
+        started = time.perf_counter()
+        METRICS.start(route)
+        try:
+            return method(self)
+        finally:
+            elapsed = time.perf_counter() - started
+            METRICS.finish(route, self.command, self.status_code, self.wfile.count - bytes_before, elapsed)
+            if METRICS.slow_request_ms is not None and elapsed * 1000 >= METRICS.slow_request_ms:
+                self.log_message('Slow request: %s %s -> %s in %.1f ms',
+                                 self.command, self.path, self.status_code, elapsed * 1000)
+    return wrapper
+
+
+class CountingWriter:
+    """File-like wrapper that counts bytes written to the client"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.count = 0
+
+    def write(self, data):
+        result = self.raw.write(data)
+        self.count += len(data)
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
+class ThreadPoolHTTPServer(http.server.HTTPServer):
+    """HTTP server that handles each request on a bounded worker pool"""
+
+    allow_reuse_address = True
+
+    def __init__(self, server_address, handler_class, workers=WORKERS):
+        super().__init__(server_address, handler_class)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='coderef-worker')
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self.process_request_worker, request, client_address)
+
+    def process_request_worker(self, request, client_address):
+        detached = False
+        try:
+            handler = self.RequestHandlerClass(request, client_address, self)
+            # Long-lived streams (SSE) take over the socket on their own thread
+            detached = getattr(handler, 'detached', False)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            if not detached:
+                self.shutdown_request(request)
+
+    def server_close(self):
+        """Stop accepting connections, then drain in-flight requests"""
+        super().server_close()
+        CHANGE_FEED.close()
+        self.executor.shutdown(wait=True)
+
 
 class CodeRefHandler(http.server.SimpleHTTPRequestHandler):
 
+    def setup(self):
+        super().setup()
+        self.wfile = CountingWriter(self.wfile)
+
+    def send_response(self, code, message=None):
+        self.status_code = code
+        super().send_response(code, message)
+
+    @instrumented
     def do_GET(self):
         parsed = urlparse(self.path)
 
@@ -26,10 +832,26 @@ class CodeRefHandler(http.server.SimpleHTTPRequestHandler):
         # API: Get file content
         elif parsed.path == '/api/file':
             self.handle_file_request(parsed)
+        # API: Full-text search
+        elif parsed.path == '/api/search':
+            self.handle_search_request(parsed)
+        # API: Query .coderef index/graph elements
+        elif parsed.path == '/api/coderef':
+            self.handle_coderef_request(parsed)
+        # API: Change feed (Server-Sent Events)
+        elif parsed.path == '/api/events':
+            self.handle_events_request()
+        # API: Server cache statistics
+        elif parsed.path == '/api/stats':
+            self.send_json_response({'tree_cache': TREE_CACHE.stats()})
+        # API: Prometheus metrics
+        elif parsed.path == '/api/metrics':
+            self.send_text_response(METRICS.render(), 'text/plain; version=0.0.4; charset=utf-8')
         else:
             # Serve static files
             super().do_GET()
 
+    @instrumented
     def do_POST(self):
         parsed = urlparse(self.path)
 
@@ -39,6 +861,7 @@ class CodeRefHandler(http.server.SimpleHTTPRequestHandler):
         else:
             self.send_error(404, "Not found")
 
+    @instrumented
     def do_DELETE(self):
         parsed = urlparse(self.path)
 
@@ -60,13 +883,7 @@ class CodeRefHandler(http.server.SimpleHTTPRequestHandler):
     def handle_get_projects(self):
         """Return all saved projects"""
         try:
-            if os.path.exists(PROJECTS_FILE):
-                with open(PROJECTS_FILE, 'r') as f:
-                    projects = json.load(f)
-            else:
-                projects = []
-
-            self.send_json_response(projects)
+            self.send_json_response(PROJECT_STORE.all())
         except Exception as e:
             self.send_error(500, f"Error loading projects: {str(e)}")
 
@@ -88,25 +905,8 @@ class CodeRefHandler(http.server.SimpleHTTPRequestHandler):
                     self.send_error(400, f"Path does not exist: {project['path']}")
                     return
 
-            # Load existing projects
-            if os.path.exists(PROJECTS_FILE):
-                with open(PROJECTS_FILE, 'r') as f:
-                    projects = json.load(f)
-            else:
-                projects = []
-
-            # Check if project ID already exists
-            existing_index = next((i for i, p in enumerate(projects) if p['id'] == project['id']), None)
-            if existing_index is not None:
-                # Update existing
-                projects[existing_index] = project
-            else:
-                # Add new
-                projects.append(project)
-
-            # Save to file
-            with open(PROJECTS_FILE, 'w') as f:
-                json.dump(projects, f, indent=2)
+            # Update existing or add new (keyed by id)
+            PROJECT_STORE.save(project)
 
             self.send_json_response({'success': True, 'project': project})
         except Exception as e:
@@ -115,19 +915,11 @@ class CodeRefHandler(http.server.SimpleHTTPRequestHandler):
     def handle_delete_project(self, project_id):
         """Delete a project by ID"""
         try:
-            if not os.path.exists(PROJECTS_FILE):
+            if not PROJECT_STORE.exists():
                 self.send_error(404, "No projects found")
                 return
 
-            with open(PROJECTS_FILE, 'r') as f:
-                projects = json.load(f)
-
-            # Filter out the project
-            projects = [p for p in projects if p['id'] != project_id]
-
-            # Save updated list
-            with open(PROJECTS_FILE, 'w') as f:
-                json.dump(projects, f, indent=2)
+            PROJECT_STORE.delete(project_id)
 
             self.send_json_response({'success': True, 'deleted': project_id})
         except Exception as e:
@@ -143,13 +935,201 @@ class CodeRefHandler(http.server.SimpleHTTPRequestHandler):
             return
 
         try:
-            tree = self.build_tree(folder_path)
+            depth = self.get_int_param(params, 'depth')
+            offset = self.get_int_param(params, 'offset', 0)
+            limit = self.get_int_param(params, 'limit')
+            meta = self.get_bool_param(params, 'meta')
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return
+
+        try:
+            tree = self.build_tree(folder_path, depth, offset, limit, meta)
             self.send_json_response(tree)
         except Exception as e:
             self.send_error(500, f"Error reading directory: {str(e)}")
 
+    def handle_search_request(self, parsed):
+        """Search file contents across registered projects"""
+        params = parse_qs(parsed.query)
+        query = params.get('q', [''])[0]
+        project_id = params.get('project', [''])[0]
+
+        if not query.strip():
+            self.send_error(400, "Missing query: q")
+            return
+
+        try:
+            limit = self.get_int_param(params, 'limit', 50)
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return
+
+        try:
+            projects = [
+                p for p in PROJECT_STORE.all()
+                if (not project_id or p['id'] == project_id) and os.path.isdir(p['path'])
+            ]
+            if project_id and not projects:
+                self.send_error(404, f"Project not found: {project_id}")
+                return
+
+            results = []
+            total = 0
+            for project in projects:
+                hits, matched = get_search_index(project).search(query, limit)
+                total += matched
+                for hit in hits:
+                    hit['project'] = project['id']
+                    results.append(hit)
+
+            results.sort(key=lambda hit: (-hit['score'], hit['path']))
+            self.send_json_response({
+                'query': query,
+                'results': results[:limit],
+                'total': total
+            })
+        except Exception as e:
+            self.send_error(500, f"Error searching: {str(e)}")
+
+    def handle_coderef_request(self, parsed):
+        """Page through a project's .coderef index.json or graph.json
+
+        Any parameter outside CODEREF_PARAMS is an equality filter on that
+        column (e.g. type=function&file=src/index.ts), evaluated over the
+        columnar form rather than per-element dicts.
+        """
+        params = parse_qs(parsed.query)
+        project_id = params.get('project', [''])[0]
+        doc = params.get('doc', ['index'])[0]
+        table_name = params.get('table', [''])[0]
+
+        if doc not in CODEREF_FILES:
+            self.send_error(400, f"Invalid doc: {doc}")
+            return
+
+        try:
+            offset = self.get_int_param(params, 'offset', 0)
+            limit = self.get_int_param(params, 'limit', 100)
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return
+
+        project = next((p for p in PROJECT_STORE.all() if p['id'] == project_id), None)
+        if project is None:
+            self.send_error(404, f"Project not found: {project_id}")
+            return
+
+        path = os.path.join(project['path'], *CODEREF_FILES[doc])
+        if not os.path.isfile(path):
+            self.send_error(404, f"No {doc} for project: {project_id}")
+            return
+
+        try:
+            document = COLUMN_STORE.get(path)
+            if isinstance(document, dict):
+                tables = [key for key, value in document.items() if isinstance(value, Table)]
+                if not table_name:
+                    # index.json keeps its records under 'elements' (or its only record array)
+                    table_name = CODEREF_DEFAULT_TABLES[doc]
+                    if doc == 'index' and table_name not in tables and len(tables) == 1:
+                        table_name = tables[0]
+                table = document.get(table_name)
+            else:
+                table = document
+            if not isinstance(table, Table):
+                self.send_error(404, f"No element table in {doc}: {table_name}")
+                return
+
+            fields = {name for name, _ in table.order}
+            unknown = sorted(name for name in params if name not in CODEREF_PARAMS and name not in fields)
+            if unknown:
+                self.send_error(400, f"Unknown filter field: {', '.join(unknown)}")
+                return
+
+            rows = None
+            for name, values in params.items():
+                if name in CODEREF_PARAMS:
+                    continue
+                matches = set(table.where(name, self.column_value(table, name, values[0])))
+                rows = matches if rows is None else rows & matches
+
+            rows = range(len(table)) if rows is None else sorted(rows)
+            self.send_json_response({
+                'project': project_id,
+                'doc': doc,
+                'total': len(rows),
+                'offset': offset,
+                'elements': [table[i] for i in rows[offset:offset + limit]]
+            })
+        except Exception as e:
+            self.send_error(500, f"Error reading {doc}: {str(e)}")
+
+    def column_value(self, table, name, value):
+        """Convert a query string value to the type of the column it filters"""
+        column = table.columns.get(name)
+        kind = column.kind if column is not None else 'str'
+        if kind == 'int':
+            return int(value) if value.lstrip('-').isdigit() else value
+        if kind == 'float':
+            try:
+                return float(value)
+            except ValueError:
+                return value
+        if kind == 'bool':
+            return value.lower() in ('1', 'true', 'yes')
+        return value
+
+    def handle_events_request(self):
+        """Open an SSE stream of file change events
+
+        The socket is handed to a dedicated thread so open streams do not
+        occupy request workers.
+        """
+        CHANGE_FEED.start()
+
+        self.send_response(200)
+        self.send_header('Content-type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.flush()
+
+        last_event_id = self.headers.get('Last-Event-ID')
+        self.detached = True
+        self.close_connection = True
+        threading.Thread(
+            target=CHANGE_FEED.stream,
+            args=(self.connection, last_event_id),
+            name='coderef-sse',
+            daemon=True
+        ).start()
+
+    def get_int_param(self, params, name, default=None):
+        """Parse a non-negative integer query parameter"""
+        value = params.get(name, [''])[0]
+        if value == '':
+            return default
+
+        try:
+            number = int(value)
+        except ValueError:
+            raise ValueError(f"Invalid {name}: {value}")
+
+        if number < 0:
+            raise ValueError(f"Invalid {name}: {value}")
+        return number
+
+    def get_bool_param(self, params, name):
+        """Parse a boolean flag query parameter (1/true/yes)"""
+        return params.get(name, [''])[0].lower() in ('1', 'true', 'yes')
+
     def handle_file_request(self, parsed):
-        """Return file content"""
+        """Return file content
+
+        raw=1 streams the bytes as-is (with Range support); otherwise the
+        content is JSON-wrapped, optionally limited to an offset/length window.
+        """
         params = parse_qs(parsed.query)
         file_path = params.get('path', [''])[0]
 
@@ -158,56 +1138,408 @@ class CodeRefHandler(http.server.SimpleHTTPRequestHandler):
             return
 
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            raw = self.get_bool_param(params, 'raw')
+            offset = self.get_int_param(params, 'offset')
+            length = self.get_int_param(params, 'length')
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return
 
-            file_info = {
-                'content': content,
-                'name': os.path.basename(file_path),
-                'size': os.path.getsize(file_path),
-                'modified': os.path.getmtime(file_path)
-            }
-            self.send_json_response(file_info)
+        if raw:
+            self.handle_raw_file(file_path)
+            return
+
+        try:
+            # Revalidate from stat alone so unchanged files are never re-read
+            etag = self.file_etag(file_path, offset, length)
+            if self.etag_matches(etag):
+                self.send_not_modified(etag)
+                return
+
+            if offset is None and length is None:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+
+                file_info = {
+                    'content': content,
+                    'name': os.path.basename(file_path),
+                    'size': os.path.getsize(file_path),
+                    'modified': os.path.getmtime(file_path)
+                }
+            else:
+                file_info = self.read_file_window(file_path, offset or 0, length)
+            self.send_json_response(file_info, etag)
         except Exception as e:
             self.send_error(500, f"Error reading file: {str(e)}")
 
-    def build_tree(self, path):
-        """Build folder tree structure"""
+    def read_file_window(self, file_path, offset, length):
+        """Read a byte window of a file, trimmed to whole UTF-8 characters
+
+        The returned offset/length describe the bytes actually decoded, so
+        the next page starts at offset + length.
+        """
+        size = os.path.getsize(file_path)
+        with open(file_path, 'rb') as f:
+            f.seek(offset)
+            data = f.read(length) if length is not None else f.read()
+
+        start = 0
+        end = len(data)
+
+        # Skip continuation bytes of a character that began before the window
+        if offset > 0:
+            while start < min(3, end) and (data[start] & 0xC0) == 0x80:
+                start += 1
+
+        # Leave a character split by the window end for the next page
+        if offset + end < size:
+            for back in range(1, min(4, end - start) + 1):
+                byte = data[end - back]
+                if (byte & 0xC0) == 0x80:
+                    continue
+                if byte >= 0xC0:
+                    needed = 2 if byte < 0xE0 else 3 if byte < 0xF0 else 4
+                    if needed > back:
+                        end -= back
+                break
+
+        return {
+            'content': data[start:end].decode('utf-8'),
+            'name': os.path.basename(file_path),
+            'size': size,
+            'modified': os.path.getmtime(file_path),
+            'offset': offset + start,
+            'length': end - start,
+            'has_more': offset + end < size
+        }
+
+    def handle_raw_file(self, file_path):
+        """Stream file bytes, honouring a single-range Range header"""
+        try:
+            f = open(file_path, 'rb')
+        except Exception as e:
+            self.send_error(500, f"Error reading file: {str(e)}")
+            return
+
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            etag = self.file_etag(file_path)
+            if self.etag_matches(etag):
+                self.send_not_modified(etag)
+                return
+
+            try:
+                byte_range = self.parse_range_header(self.headers.get('Range'), size)
+            except ValueError:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.end_headers()
+                return
+
+            # Whole text files go out compressed; the compressed length is not
+            # known up front, so the body is sent with chunked transfer encoding
+            content_type = self.guess_type(file_path)
+            if byte_range is None and size >= COMPRESS_MIN_SIZE and self.request_version == 'HTTP/1.1' \
+                    and (content_type.startswith('text/') or content_type in COMPRESSIBLE_TYPES):
+                encoding = self.choose_encoding()
+                if encoding:
+                    self.send_compressed_chunks(f, content_type, encoding, etag)
+                    return
+
+            start, end = byte_range if byte_range else (0, size - 1)
+            count = end - start + 1
+
+            self.send_response(206 if byte_range else 200)
+            self.send_header('Content-type', content_type)
+            self.send_header('Content-Length', str(count))
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('ETag', f'"{etag}"')
+            if byte_range:
+                self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+
+            # Zero-copy where the platform supports it (falls back to send())
+            if count > 0:
+                self.wfile.count += self.connection.sendfile(f, start, count)
+
+    def send_compressed_chunks(self, f, content_type, encoding, etag):
+        """Stream an open file gzip/brotli-compressed with Transfer-Encoding: chunked"""
+        if encoding == 'br':
+            compressor = brotli.Compressor()
+            compress, finish = compressor.process, compressor.finish
+        else:
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+            compress, finish = compressor.compress, compressor.flush
+
+        # Chunked encoding needs an HTTP/1.1 status line; the connection is
+        # closed afterwards so the rest of the server can stay on HTTP/1.0
+        self.protocol_version = 'HTTP/1.1'
+        self.send_response(200)
+        self.send_header('Content-type', content_type)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.send_header('Content-Encoding', encoding)
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', f'"{etag}-{encoding}"')
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+
+        def write_chunk(data):
+            if data:
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+
+        while True:
+            block = f.read(RAW_CHUNK_SIZE)
+            if not block:
+                break
+            write_chunk(compress(block))
+        write_chunk(finish())
+        self.wfile.write(b'0\r\n\r\n')
+
+    def parse_range_header(self, header, size):
+        """Parse a 'bytes=' Range header into an inclusive (start, end)
+
+        Returns None when the whole file should be sent (no header, multiple
+        ranges or malformed syntax) and raises ValueError when unsatisfiable.
+        """
+        if not header or not header.startswith('bytes=') or ',' in header:
+            return None
+
+        first, sep, last = header[len('bytes='):].strip().partition('-')
+        if not sep or not (first.isdigit() or last.isdigit()):
+            return None
+        if (first and not first.isdigit()) or (last and not last.isdigit()):
+            return None
+
+        if first == '':
+            # Suffix range: last N bytes
+            suffix = int(last)
+            if suffix == 0 or size == 0:
+                raise ValueError("Unsatisfiable range")
+            return max(size - suffix, 0), size - 1
+
+        start = int(first)
+        end = int(last) if last else None
+        if end is not None and end < start:
+            return None
+        if start >= size:
+            raise ValueError("Unsatisfiable range")
+        if end is None:
+            end = size - 1
+        return start, min(end, size - 1)
+
+    def build_tree(self, path, depth=None, offset=0, limit=None, meta=False):
+        """Build folder tree structure
+
+        depth limits how many folder levels are expanded (None = unlimited).
+        Folders past the depth limit carry only child_count and has_more.
+        offset/limit page the children of the requested folder; nested
+        folders are capped at the first `limit` entries.
+        meta adds size, modified and symlink fields to every node.
+        """
         tree = {
             'name': os.path.basename(path),
             'path': path,
             'type': 'folder',
-            'children': []
+            'children': [],
+            'child_count': 0,
+            'has_more': False
         }
+        if meta:
+            tree.update(self.node_metadata(path, os.path.islink(path)))
 
         try:
-            entries = sorted(os.listdir(path))
+            entries = TREE_CACHE.list_dir(path)
+        except PermissionError:
+            return tree
 
-            for entry in entries:
-                full_path = os.path.join(path, entry)
+        tree['child_count'] = len(entries)
 
-                if os.path.isdir(full_path):
-                    tree['children'].append(self.build_tree(full_path))
-                else:
-                    tree['children'].append({
-                        'name': entry,
-                        'path': full_path,
-                        'type': 'file'
-                    })
-        except PermissionError:
-            pass
+        # Collapsed folder: report size only, client expands on demand
+        if depth is not None and depth <= 0:
+            tree['has_more'] = len(entries) > 0
+            return tree
+
+        end = offset + limit if limit is not None else None
+        page = entries[offset:end]
+        tree['has_more'] = offset + len(page) < len(entries)
+        child_depth = depth - 1 if depth is not None else None
+
+        for name, is_dir, is_symlink in page:
+            full_path = os.path.join(path, name)
+
+            if is_dir:
+                tree['children'].append(self.build_tree(full_path, child_depth, 0, limit, meta))
+            else:
+                node = {
+                    'name': name,
+                    'path': full_path,
+                    'type': 'file'
+                }
+                if meta:
+                    node.update(self.node_metadata(full_path, is_symlink))
+                tree['children'].append(node)
 
         return tree
 
-    def send_json_response(self, data):
-        """Send JSON response"""
+    def node_metadata(self, path, is_symlink):
+        """Return size/modified/symlink fields for a tree node
+
+        Metadata is read fresh rather than cached: editing a file in place
+        does not touch its directory's mtime.
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            # Broken symlink: fall back to the link itself
+            try:
+                st = os.lstat(path)
+            except OSError:
+                return {'size': None, 'modified': None, 'symlink': is_symlink}
+
+        return {'size': st.st_size, 'modified': st.st_mtime, 'symlink': is_symlink}
+
+    def send_json_response(self, data, etag=None):
+        """Send JSON response
+
+        Supports If-None-Match revalidation (the ETag defaults to a hash of
+        the body) and gzip/brotli compression above COMPRESS_MIN_SIZE.
+        """
+        body = json.dumps(data).encode()
+        if etag is None:
+            etag = hashlib.sha1(body).hexdigest()
+
+        if self.etag_matches(etag):
+            self.send_not_modified(etag)
+            return
+
+        encoding = self.choose_encoding() if len(body) >= COMPRESS_MIN_SIZE else None
+        if encoding == 'br':
+            body = brotli.compress(body)
+        elif encoding == 'gzip':
+            body = gzip.compress(body, compresslevel=6, mtime=0)
+
         self.send_response(200)
         self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        # Each encoding is a distinct representation, so it gets its own tag
+        self.send_header('ETag', f'"{etag}-{encoding}"' if encoding else f'"{etag}"')
+        self.send_header('Vary', 'Accept-Encoding')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.end_headers()
-        self.wfile.write(json.dumps(data).encode())
+        self.wfile.write(body)
 
-with socketserver.TCPServer(("", PORT), CodeRefHandler) as httpd:
-    print(f"Server running at http://localhost:{PORT}/")
+    def send_text_response(self, text, content_type):
+        """Send an uncached plain-text response"""
+        body = text.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def file_etag(self, file_path, offset=None, length=None):
+        """Derive an ETag from file mtime/size (plus the requested window)"""
+        st = os.stat(file_path)
+        etag = f"{st.st_mtime_ns:x}-{st.st_size:x}"
+        if offset is not None or length is not None:
+            etag += f"-{offset or 0}-{length if length is not None else ''}"
+        return etag
+
+    def etag_matches(self, etag):
+        """Check a GET request's If-None-Match header against an ETag"""
+        header = self.headers.get('If-None-Match')
+        if self.command != 'GET' or not header:
+            return False
+
+        for candidate in header.split(','):
+            candidate = candidate.strip()
+            if candidate == '*':
+                return True
+            if candidate.startswith('W/'):
+                candidate = candidate[2:]
+            candidate = candidate.strip('"')
+            for suffix in ('-gzip', '-br'):
+                if candidate.endswith(suffix):
+                    candidate = candidate[:-len(suffix)]
+            if candidate == etag:
+                return True
+
+        return False
+
+    def send_not_modified(self, etag):
+        """Send 304 Not Modified for a matching If-None-Match"""
+        self.send_response(304)
+        self.send_header('ETag', f'"{etag}"')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+
+    def choose_encoding(self):
+        """Pick the best response encoding the client accepts (br > gzip)"""
+        accepted = {}
+        for part in self.headers.get('Accept-Encoding', '').split(','):
+            name, _, params = part.strip().partition(';')
+            quality = 1.0
+            params = params.strip()
+            if params.startswith('q='):
+                try:
+                    quality = float(params[2:])
+                except ValueError:
+                    quality = 0.0
+            if name:
+                accepted[name.strip().lower()] = quality
+
+        if brotli is not None and accepted.get('br', 0) > 0:
+            return 'br'
+        if accepted.get('gzip', 0) > 0:
+            return 'gzip'
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="CodeRef Explorer server")
+    parser.add_argument("--port", type=int, default=PORT, help=f"Port to listen on (default: {PORT})")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help=f"Number of request worker threads (default: {WORKERS})")
+    parser.add_argument("--tree-cache-size", type=int, default=TREE_CACHE_SIZE,
+                        help=f"Maximum directories kept in the tree cache, 0 disables (default: {TREE_CACHE_SIZE})")
+    parser.add_argument("--slow-request-ms", type=float, default=SLOW_REQUEST_MS,
+                        help="Log requests slower than this many milliseconds (default: off)")
+    args = parser.parse_args()
+
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.tree_cache_size < 0:
+        parser.error("--tree-cache-size must not be negative")
+
+    TREE_CACHE.max_entries = args.tree_cache_size
+    METRICS.slow_request_ms = args.slow_request_ms
+
+    httpd = ThreadPoolHTTPServer(("", args.port), CodeRefHandler, args.workers)
+
+    # shutdown() blocks until serve_forever() returns, so it must run off the main thread
+    def request_shutdown(signum, frame):
+        threading.Thread(target=httpd.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, request_shutdown)
+
+    print(f"Server running at http://localhost:{args.port}/ ({args.workers} workers)")
     print("Press Ctrl+C to stop")
-    httpd.serve_forever()
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("Shutting down, waiting for in-flight requests...")
+        httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()